@@ -0,0 +1,93 @@
+"""
+Background work for the Streamlit app.
+
+Slow upstream calls run on one process-wide thread pool so they don't block a
+rerun. Tasks are keyed: while a task with the same key is running, finished
+successfully less than `max_age` seconds ago, or failed less than
+BACKGROUND_FAILURE_TTL seconds ago, `submit` returns its Future instead of
+starting the work again, so reruns and sessions share one result.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+BACKGROUND_MAX_WORKERS = 4
+# How long a finished task's result is reused, in seconds
+BACKGROUND_RESULT_TTL = 600
+# How long after failing a task is reported as failed before it may be retried, in seconds
+BACKGROUND_FAILURE_TTL = 60
+# Finished tasks kept for reuse; the oldest are dropped first
+BACKGROUND_MAX_TASKS = 256
+
+_executor = None
+_tasks = {}
+# Reentrant: a task that is already done runs its callback inside `submit`
+_lock = threading.RLock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BACKGROUND_MAX_WORKERS, thread_name_prefix='background')
+    return _executor
+
+def _on_done(key):
+    def callback(future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"Background task {key} failed: {future.exception()}")
+            # The failure TTL counts from when the task failed
+            with _lock:
+                task = _tasks.get(key)
+                if task is not None and task[0] is future:
+                    _tasks[key] = (future, time.monotonic())
+    return callback
+
+def _prune():
+    excess = len(_tasks) - BACKGROUND_MAX_TASKS
+    for key in [key for key, (future, _) in _tasks.items() if future.done()][:max(excess, 0)]:
+        del _tasks[key]
+
+def submit(key, function, *args, max_age=BACKGROUND_RESULT_TTL):
+    """
+    Run `function(*args)` in the background, reusing a recent task with the same key.
+
+    :param key: Hashable task key, e.g. ('news', symbol)
+    :param max_age: Seconds a successful result is reused before the task is run again
+    :return: concurrent.futures.Future
+    """
+    now = time.monotonic()
+    with _lock:
+        task = _tasks.get(key)
+        if task is not None:
+            future, submitted_at = task
+            if not future.done():
+                return future
+            ttl = max_age if future.exception() is None else min(max_age, BACKGROUND_FAILURE_TTL)
+            if now - submitted_at < ttl:
+                return future
+            del _tasks[key]
+
+        # Spans of the task are recorded in the trace of the rerun that started it
+        future = _get_executor().submit(metrics.in_current_trace(function), *args)
+        _tasks[key] = (future, now)
+        future.add_done_callback(_on_done(key))
+        _prune()
+    return future
+
+def prefetch(key, function, *args, max_age=BACKGROUND_RESULT_TTL):
+    """
+    Warm a cache in the background by calling `function(*args)` and discarding its result.
+    """
+    def run():
+        function(*args)
+
+    submit(key, run, max_age=max_age)
+
+def result_if_done(future):
+    """
+    Return the result of a finished Future, or None if it is still running or failed.
+    """
+    if not future.done() or future.exception() is not None:
+        return None
+    return future.result()
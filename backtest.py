@@ -0,0 +1,149 @@
+"""
+Vectorized SMA-crossover backtests.
+
+A strategy is long while the fast SMA is above the slow one and flat otherwise,
+decided on each close and held over the next bar, so no bar trades on its own
+close. Every SMA in a grid comes from one shared cumulative sum of the closes,
+and (fast, slow) pairs are evaluated BACKTEST_BATCH_PAIRS at a time as 2-D
+arrays, which keeps memory bounded for grids of thousands of pairs.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import metrics
+from stock_data import get_watchlist_history
+
+# (fast, slow) pairs evaluated together in one batch of array operations
+BACKTEST_BATCH_PAIRS = 256
+# Symbols swept concurrently
+BACKTEST_MAX_WORKERS = 8
+# Cost of one position change, as a fraction of the position's value
+BACKTEST_COST = 0.0005
+
+RESULT_COLUMNS = ['fast', 'slow', 'total_return', 'max_drawdown', 'trades', 'exposure']
+
+def window_grid(fast_windows, slow_windows):
+    """
+    All (fast, slow) pairs with fast < slow.
+
+    :return: Integer array of shape (pairs, 2)
+    """
+    fast, slow = np.meshgrid(np.asarray(fast_windows, dtype='int64'), np.asarray(slow_windows, dtype='int64'), indexing='ij')
+    pairs = np.column_stack([fast.ravel(), slow.ravel()])
+    return pairs[pairs[:, 0] < pairs[:, 1]]
+
+def sma_matrix(close, windows):
+    """
+    Simple moving averages of `close` for every window, from one cumulative sum.
+
+    :return: Array of shape (windows, bars), NaN until a window is full
+    """
+    windows = np.asarray(windows, dtype='int64')
+    bars = len(close)
+    cumulative = np.concatenate(([0.0], np.cumsum(close, dtype='float64')))
+    ends = np.arange(1, bars + 1)
+    starts = ends[np.newaxis, :] - windows[:, np.newaxis]
+    with np.errstate(invalid='ignore'):
+        sma = (cumulative[ends][np.newaxis, :] - cumulative[np.maximum(starts, 0)]) / windows[:, np.newaxis]
+    sma[starts < 0] = np.nan
+    return sma
+
+def _evaluate(sma, fast_rows, slow_rows, log_returns, cost):
+    # Position held over bar t+1 is decided on the close of bar t
+    position = sma[fast_rows, :-1] > sma[slow_rows, :-1]
+    changes = np.diff(position, axis=1, prepend=False)
+    # Log equity: the bar's log return while long, minus log(1 - cost) per position change
+    equity = np.cumsum(np.where(position, log_returns, 0.0) + changes * np.log1p(-cost), axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 0.0)
+    return (
+        np.expm1(equity[:, -1]),
+        np.expm1((equity - peak).min(axis=1)),
+        np.count_nonzero(changes & position, axis=1),
+        position.mean(axis=1),
+    )
+
+def sweep_sma_crossover(close, pairs, cost=BACKTEST_COST, batch_size=BACKTEST_BATCH_PAIRS):
+    """
+    Backtest every (fast, slow) pair on one price series.
+
+    :param close: Closing prices (Series or array), NaNs are dropped
+    :param pairs: Array of (fast, slow) windows, e.g. from `window_grid`
+    :param cost: Cost per position change as a fraction of traded value
+    :param batch_size: Pairs evaluated per batch
+    :return: DataFrame with RESULT_COLUMNS, one row per pair
+    """
+    close = np.asarray(close, dtype='float64')
+    close = close[~np.isnan(close)]
+    pairs = np.asarray(pairs, dtype='int64').reshape(-1, 2)
+    columns = {
+        'fast': pairs[:, 0].astype('int16'),
+        'slow': pairs[:, 1].astype('int16'),
+        'total_return': np.full(len(pairs), np.nan, dtype='float32'),
+        'max_drawdown': np.full(len(pairs), np.nan, dtype='float32'),
+        'trades': np.zeros(len(pairs), dtype='int32'),
+        'exposure': np.zeros(len(pairs), dtype='float32'),
+    }
+    if len(close) < 2 or len(pairs) == 0:
+        return pd.DataFrame(columns)
+
+    windows, rows = np.unique(pairs, return_inverse=True)
+    rows = rows.reshape(-1, 2)
+    sma = sma_matrix(close, windows)
+    log_returns = np.log(close[1:] / close[:-1])
+
+    for start in range(0, len(pairs), batch_size):
+        batch = slice(start, start + batch_size)
+        total, drawdown, trades, exposure = _evaluate(sma, rows[batch, 0], rows[batch, 1], log_returns, cost)
+        columns['total_return'][batch] = total
+        columns['max_drawdown'][batch] = drawdown
+        columns['trades'][batch] = trades
+        columns['exposure'][batch] = exposure
+
+    # Pairs whose slow window never fills have no result
+    unfilled = pairs[:, 1] >= len(close)
+    columns['total_return'][unfilled] = np.nan
+    columns['max_drawdown'][unfilled] = np.nan
+    return pd.DataFrame(columns)
+
+def sweep_symbols(closes, pairs, cost=BACKTEST_COST, max_workers=BACKTEST_MAX_WORKERS):
+    """
+    Run `sweep_sma_crossover` for every column of a wide frame of closes in parallel.
+
+    The array work releases the GIL, so symbols are spread over threads.
+
+    :param closes: DataFrame indexed by time with one column per symbol
+    :return: DataFrame with a categorical `symbol` column followed by RESULT_COLUMNS
+    """
+    symbols = list(closes.columns)
+    if not symbols:
+        return pd.DataFrame(columns=['symbol'] + RESULT_COLUMNS)
+
+    with metrics.span('backtest'), ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+        results = list(executor.map(lambda symbol: sweep_sma_crossover(closes[symbol].to_numpy(), pairs, cost), symbols))
+
+    table = pd.concat(results, ignore_index=True)
+    table.insert(0, 'symbol', pd.Categorical(np.repeat(symbols, [len(result) for result in results]), categories=symbols))
+    return table
+
+def summarize_sweep(table):
+    """
+    Best pair per symbol by total return, and each pair's median result across symbols.
+
+    :return: Tuple of (best per symbol, per-pair summary sorted by median return)
+    """
+    ranked = table.dropna(subset=['total_return'])
+    best = ranked.loc[ranked.groupby('symbol', observed=True)['total_return'].idxmax()].set_index('symbol')
+    pairs = ranked.groupby(['fast', 'slow'])[['total_return', 'max_drawdown', 'trades']].median()
+    return best, pairs.sort_values('total_return', ascending=False)
+
+def run_watchlist_sweep(symbols, fast_windows, slow_windows, period="2y", cost=BACKTEST_COST):
+    """
+    Sweep a (fast, slow) grid over the daily closes of a whole watchlist.
+
+    :return: Tuple of (results table from `sweep_symbols`, dict of symbol -> error message)
+    """
+    history, failures = get_watchlist_history(symbols, period=period)
+    if history.empty:
+        return pd.DataFrame(columns=['symbol'] + RESULT_COLUMNS), failures
+    closes = history.xs('Close', axis=1, level=1)
+    return sweep_symbols(closes, window_grid(fast_windows, slow_windows), cost), failures
@@ -0,0 +1,210 @@
+"""
+Local stand-ins for the upstream services used by the app.
+
+Every fixture is generated deterministically from a seed, so benchmark runs on
+different versions see exactly the same data:
+
+- FakeTicker / fake_download replace yfinance
+- FakeFred replaces the fredapi client
+- stub_server() serves Yahoo-style news pages and article pages over local HTTP,
+  with ETags so conditional requests can be answered with 304
+"""
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+INTERVAL_FREQUENCIES = {'1m': 'min', '5m': '5min', '15m': '15min', '30m': '30min', '1h': 'h', '1d': 'B'}
+
+# Bars served per interval unless a benchmark case asks for a different size
+DEFAULT_BARS = {'1m': 390, '5m': 390, '15m': 390, '30m': 780, '1h': 1000, '1d': 252}
+
+# Simulated upstream round-trip time in seconds, applied by every stand-in
+UPSTREAM_LATENCY = 0.0
+
+_bar_fixtures = {}
+_bar_fixtures_lock = threading.Lock()
+
+def _seed(*parts):
+    return zlib.crc32('|'.join(str(part) for part in parts).encode('utf-8'))
+
+def _simulate_latency():
+    if UPSTREAM_LATENCY > 0:
+        time.sleep(UPSTREAM_LATENCY)
+
+def make_ohlcv(symbol, interval='1d', bars=252, end=None):
+    """
+    Build a deterministic random-walk OHLCV frame shaped like yfinance history.
+    """
+    end = (end or pd.Timestamp.now(tz='America/New_York')).floor('min')
+    index = pd.date_range(end=end, periods=bars, freq=INTERVAL_FREQUENCIES[interval], name='Datetime')
+    rng = np.random.default_rng(_seed(symbol, interval, bars))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000, 1_000_000, bars),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+
+def get_bar_fixture(symbol, interval, bars):
+    key = (symbol, interval, bars)
+    with _bar_fixtures_lock:
+        if key not in _bar_fixtures:
+            _bar_fixtures[key] = make_ohlcv(symbol, interval, bars)
+        return _bar_fixtures[key]
+
+def make_info(symbol):
+    return {
+        'symbol': symbol,
+        'longName': f"{symbol} Holdings Inc.",
+        'marketCap': 1_000_000_000 + _seed(symbol) % 1_000_000_000,
+        'trailingPE': 20.5,
+        'trailingEps': 4.2,
+        'dividendYield': 0.01,
+        'currentPrice': 123.45,
+        'sector': 'Technology',
+        'industry': 'Software',
+    }
+
+class FakeTicker:
+    """
+    Stand-in for yfinance.Ticker backed by generated bars.
+    """
+    # Bars available per interval; cases may change these, run() resets them per stage
+    bars = dict(DEFAULT_BARS)
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        _simulate_latency()
+        return make_info(self.symbol) if not self.symbol.startswith('INVALID') else {}
+
+    def history(self, period=None, interval='1d', start=None):
+        _simulate_latency()
+        data = get_bar_fixture(self.symbol, interval, self.bars[interval])
+        if start is not None:
+            data = data[data.index >= start]
+        return data.copy()
+
+def fake_download(symbols, period='1mo', interval='1d', group_by='ticker', actions=False, **kwargs):
+    """
+    Stand-in for yfinance.download returning (symbol, field) columns.
+    """
+    _simulate_latency()
+    bars = FakeTicker.bars[interval]
+    columns = [] if actions else ['Dividends', 'Stock Splits']
+    frames = {symbol: get_bar_fixture(symbol, interval, bars).drop(columns=columns) for symbol in symbols}
+    return pd.concat(frames, axis=1)
+
+class _YFinanceException(Exception):
+    pass
+
+def fake_yfinance():
+    """
+    Return an object that can replace the `yf` module used by stock_data.
+    """
+    return SimpleNamespace(
+        Ticker=FakeTicker,
+        download=fake_download,
+        exceptions=SimpleNamespace(YFinanceException=_YFinanceException),
+    )
+
+class FakeFred:
+    """
+    Stand-in for fredapi.Fred with monthly series ending this month.
+    """
+    def __init__(self, observations=240):
+        self.observations = observations
+
+    def get_series_info(self, indicator):
+        _simulate_latency()
+        return pd.Series({'last_updated': '2026-01-01 07:00:00-05', 'frequency_short': 'M'})
+
+    def get_series(self, indicator, observation_start=None, observation_end=None):
+        _simulate_latency()
+        index = pd.date_range(end=pd.Timestamp.now().normalize(), periods=self.observations, freq='MS')
+        rng = np.random.default_rng(_seed(indicator))
+        series = pd.Series(100 + np.cumsum(rng.normal(0, 1, self.observations)), index=index)
+        return series[observation_start:observation_end]
+
+def make_news_page(symbol, articles=20):
+    """
+    Build a Yahoo-style news page with `articles` items among unrelated markup.
+    """
+    filler = ''.join(f'<div class="nav-item"><a href="/nav/{i}">Section {i}</a></div>' for i in range(200))
+    items = ''.join(
+        f'<div class="Ov(h) Pend(44px) Pstart(25px)">'
+        f'<h3><a href="/news/{symbol.lower()}-story-{i}.html">{symbol} headline {i}</a></h3>'
+        f'<p>Summary of story {i} about {symbol}.</p></div>'
+        for i in range(articles)
+    )
+    return f'<html><head><title>{symbol} news</title></head><body>{filler}{items}{filler}</body></html>'
+
+def make_article_page(path, paragraphs=30):
+    rng = np.random.default_rng(_seed(path))
+    words = np.array(['strong', 'growth', 'loss', 'decline', 'record', 'profit', 'weak', 'market', 'shares', 'guidance'])
+    body = ''.join(f"<p>{' '.join(rng.choice(words, 40))}.</p>" for _ in range(paragraphs))
+    return f'<html><body><article>{body}</article></body></html>'
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        _simulate_latency()
+        if self.path.startswith('/quote/'):
+            symbol = self.path.split('/')[2]
+            body = make_news_page(symbol)
+        else:
+            body = make_article_page(self.path)
+        payload = body.encode('utf-8')
+        etag = f'"{zlib.crc32(payload):08x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextmanager
+def stub_server():
+    """
+    Run the local HTTP stub on a free port and yield its base URL.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@contextmanager
+def patched(obj, name, value):
+    """
+    Temporarily replace `obj.name` with `value`.
+    """
+    original = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, original)
@@ -0,0 +1,395 @@
+"""
+Offline benchmark suite for the app's pipeline stages.
+
+Every stage runs against the local stand-ins in benchmarks/fixtures.py, so no
+network access is needed. The database stage runs only when PGHOST/PGDATABASE
+point at a local Postgres. Usage:
+
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --compare bench_results.json --output new.json
+
+Each result records median, p95 and minimum latency, throughput and the peak
+memory of one extra run, keyed by (stage, case, size).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from benchmarks import fixtures
+import price_cache
+import utils
+
+STAGES = {}
+FakeTicker = fixtures.FakeTicker
+# Temporary directory holding the per-case caches of one run
+BENCH_ROOT = None
+
+class SkipStage(Exception):
+    pass
+
+def stage(name):
+    def register(function):
+        STAGES[name] = function
+        return function
+    return register
+
+class Case:
+    """
+    One measured scenario: `run()` is timed, `setup()` runs untimed before each repetition.
+    """
+    def __init__(self, name, size, items, run, setup=None):
+        self.name = name
+        self.size = size
+        self.items = items
+        self.run = run
+        self.setup = setup
+
+def measure(case, repeat):
+    timings = []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - start)
+
+    if case.setup:
+        case.setup()
+    tracemalloc.start()
+    case.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = float(np.median(timings))
+    return {
+        'median_s': median,
+        'p95_s': float(np.percentile(timings, 95)),
+        'min_s': float(min(timings)),
+        'items': case.items,
+        'throughput_per_s': case.items / median if median > 0 else None,
+        'peak_memory_bytes': int(peak),
+    }
+
+def fresh_cache_dir():
+    """
+    Point the app's local caches at a new empty directory and empty the in-process price cache.
+    """
+    utils.CACHE_DIR = tempfile.mkdtemp(prefix='bench-cache-', dir=BENCH_ROOT)
+    price_cache.clear()
+
+@stage('symbol_validation')
+def symbol_validation_cases(quick):
+    import stock_data
+
+    def coalesced():
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(stock_data.get_symbol_info, ['AAPL'] * 16))
+
+    yield Case('cold', '1 symbol', 1, lambda: stock_data.is_valid_symbol('AAPL'), stock_data.clear_symbol_info_cache)
+    yield Case('warm', '1 symbol', 1, lambda: stock_data.is_valid_symbol('AAPL'))
+    yield Case('coalesced', '16 concurrent lookups', 16, coalesced, stock_data.clear_symbol_info_cache)
+
+@stage('history_fetch')
+def history_fetch_cases(quick):
+    import stock_data
+
+    cases = [('1m', '1d', 390), ('30m', '60d', 780), ('1d', '1y', 252), ('1d', '10y', 2520)]
+    for interval, period, bars in cases[:2] if quick else cases:
+        def run(interval=interval, period=period, bars=bars):
+            FakeTicker.bars[interval] = bars
+            stock_data.get_stored_bars(FakeTicker('AAPL'), 'AAPL', period, interval)
+
+        yield Case('cold', f"{bars} {interval} bars", bars, run, fresh_cache_dir)
+        fresh_cache_dir()
+        run()
+        yield Case('warm', f"{bars} {interval} bars", bars, run)
+
+@stage('indicators')
+def indicator_cases(quick):
+    from indicators import compute_indicators
+
+    sizes = [(1, 390), (1, 2520), (100, 252), (1000, 252)]
+    for symbols, bars in sizes[:3] if quick else sizes:
+        close = pd.concat({f"S{i}": fixtures.get_bar_fixture(f"S{i}", '1d', bars)['Close'] for i in range(symbols)}, axis=1)
+        yield Case('full', f"{symbols} symbols x {bars} bars", symbols * bars, lambda close=close: compute_indicators(close))
+
+        _, state = compute_indicators(close.iloc[:-1])
+        yield Case('incremental', f"{symbols} symbols x 1 new bar", symbols,
+                   lambda close=close, state=state: compute_indicators(close.iloc[-1:], state=state))
+
+@stage('support_resistance')
+def support_resistance_cases(quick):
+    from support_resistance import detect_levels
+
+    for bars in (390, 2520) if quick else (390, 2520, 20000):
+        data = fixtures.get_bar_fixture('AAPL', '1m', bars)
+        yield Case('detect_levels', f"{bars} bars", bars, lambda data=data: detect_levels(data))
+
+@stage('chart_downsample')
+def chart_downsample_cases(quick):
+    from chart_data import downsample_ohlc
+
+    for bars in (780, 20000):
+        data = fixtures.get_bar_fixture('AAPL', '30m', bars)
+        yield Case('downsample_ohlc', f"{bars} bars", bars, lambda data=data: downsample_ohlc(data))
+
+@stage('export')
+def export_cases(quick):
+    import export
+
+    data = fixtures.get_bar_fixture('AAPL', '1m', 20000)
+    for fmt in export.available_formats():
+        yield Case(fmt, "20000 bars", len(data), lambda fmt=fmt: export.export_frame(data, fmt))
+
+    frames = {f"S{i}": fixtures.get_bar_fixture(f"S{i}", '1d', 252) for i in range(10 if quick else 100)}
+    yield Case('CSV archive', f"{len(frames)} symbols x 252 bars", len(frames) * 252,
+               lambda: export.export_archive(frames, 'CSV'))
+
+@stage('price_cache')
+def price_cache_cases(quick):
+    for bars in (2520, 20000) if quick else (2520, 20000, 200000):
+        data = fixtures.get_bar_fixture('AAPL', '1m', bars)
+        yield Case('put', f"{bars} bars", bars, lambda data=data: price_cache.put('bench', data, 60), price_cache.clear)
+        yield Case('get', f"{bars} bars", bars, lambda: price_cache.get('bench'),
+                   lambda data=data: price_cache.put('bench', data, 60))
+
+@stage('watchlist_quotes')
+def watchlist_cases(quick):
+    import stock_data
+
+    for symbols in (1, 50, 200) if quick else (1, 50, 200, 1000):
+        names = [f"S{i}" for i in range(symbols)]
+        run = lambda names=names: stock_data.get_watchlist_quotes(names)
+        yield Case('batch', f"{symbols} symbols", symbols, run, stock_data.clear_watchlist_cache)
+        yield Case('cached', f"{symbols} symbols", symbols, run)
+
+@stage('watchlist_closes')
+def watchlist_closes_cases(quick):
+    import stock_data
+    from columnar_store import update_meta
+
+    for symbols in (50, 200) if quick else (50, 200, 1000):
+        names = [f"S{i}" for i in range(symbols)]
+        run = lambda names=names: stock_data.get_watchlist_closes(names)
+
+        def expire(names=names):
+            price_cache.clear()
+            for name in names:
+                update_meta(os.path.join(utils.get_cache_dir('bars', '1d'), name), fetched_at=0)
+
+        yield Case('cold', f"{symbols} symbols", symbols, run, fresh_cache_dir)
+        fresh_cache_dir()
+        run()
+        yield Case('tail fetch', f"{symbols} symbols", symbols, run, expire)
+        yield Case('warm', f"{symbols} symbols", symbols, run)
+
+@stage('correlation')
+def correlation_cases(quick):
+    from correlation import align_returns, correlation_matrix, RunningCorrelation
+
+    for symbols in (50, 200) if quick else (50, 200, 500):
+        closes = pd.concat({f"S{i}": fixtures.get_bar_fixture(f"S{i}", '1d', 252)['Close'] for i in range(symbols)}, axis=1)
+        returns = align_returns(closes)
+        yield Case('full', f"{symbols} symbols x 252 bars", symbols, lambda returns=returns: correlation_matrix(returns))
+
+        def add_bar(returns=returns):
+            running = RunningCorrelation.from_returns(returns.iloc[:-1])
+            return lambda: running.add_bars(returns.to_numpy()[-1:], window=len(returns) - 1)
+        yield Case('new bar', f"{symbols} symbols x 1 bar", symbols, add_bar())
+
+        def add_symbol(returns=returns):
+            running = RunningCorrelation.from_returns(returns.iloc[:, :-1])
+            column = returns.iloc[:, -1].to_numpy()
+            return lambda: (running.add_symbol('NEW', column), running.remove_symbol('NEW'))
+        yield Case('new symbol', f"{symbols} symbols + 1", 1, add_symbol())
+
+@stage('news_scrape')
+def news_scrape_cases(quick):
+    import news_scraper
+
+    def expire():
+        for entry in news_scraper._news_cache.values():
+            entry['checked_at'] = 0
+
+    run = lambda: news_scraper.get_news_articles('AAPL')
+    yield Case('cold', "20 articles", 20, run, news_scraper.clear_news_cache)
+    yield Case('revalidated', "20 articles", 20, run, expire)
+    yield Case('warm', "20 articles", 20, run)
+
+@stage('sentiment')
+def sentiment_cases(quick):
+    import news_scraper
+    import sentiment_analysis
+
+    try:
+        sentiment_analysis._get_analyzer()
+    except LookupError:
+        raise SkipStage("VADER lexicon not available; run `python bootstrap.py --download-data`")
+
+    articles = news_scraper.get_news_articles('AAPL')
+
+    def cold():
+        fresh_cache_dir()
+        sentiment_analysis._cache_conn = None
+
+    def run():
+        sentiment_analysis.analyze_news_sentiment([dict(article) for article in articles], limit=5)
+
+    yield Case('cold', "5 articles", 5, run, cold)
+    yield Case('warm', "5 articles", 5, run)
+
+@stage('fred')
+def fred_cases(quick):
+    import economic_data
+
+    economic_data._fred = fixtures.FakeFred()
+    codes = [f"SERIES{i}" for i in range(15)]
+    for count in (3, 15):
+        run = lambda count=count: economic_data.get_economic_indicators(codes[:count])
+        yield Case('cold', f"{count} series", count, run, fresh_cache_dir)
+        fresh_cache_dir()
+        run()
+        yield Case('warm', f"{count} series", count, run)
+
+@stage('backtest')
+def backtest_cases(quick):
+    from backtest import sweep_sma_crossover, sweep_symbols, window_grid
+
+    pairs = window_grid(range(5, 105, 5), range(20, 305, 5))
+    close = fixtures.get_bar_fixture('AAPL', '1d', 2520)['Close']
+    yield Case('single symbol', f"{len(pairs)} pairs x 2520 bars", len(pairs), lambda: sweep_sma_crossover(close, pairs))
+
+    symbols = 20 if quick else 200
+    closes = pd.concat({f"S{i}": fixtures.get_bar_fixture(f"S{i}", '1d', 504)['Close'] for i in range(symbols)}, axis=1)
+    yield Case('watchlist', f"{symbols} symbols x {len(pairs)} pairs", symbols * len(pairs), lambda: sweep_symbols(closes, pairs))
+
+@stage('macro_alignment')
+def macro_alignment_cases(quick):
+    from macro_alignment import align_macro, lagged_correlations
+
+    fred = fixtures.FakeFred()
+    codes = [f"SERIES{i}" for i in range(15)]
+    series = {code: fred.get_series(code) for code in codes}
+    frequencies = {code: 'M' for code in codes}
+    for bars in (252, 2520):
+        prices = fixtures.get_bar_fixture('AAPL', '1d', bars)
+        yield Case('align_macro', f"15 series x {bars} bars", bars, lambda prices=prices: align_macro(prices, series, frequencies))
+    aligned = align_macro(fixtures.get_bar_fixture('AAPL', '1d', 2520), series, frequencies, 'W-FRI')
+    yield Case('lagged_correlations', f"15 series x {len(aligned)} weekly bars", len(aligned), lambda: lagged_correlations(aligned))
+
+@stage('database')
+def database_cases(quick):
+    if not (os.environ.get('PGHOST') and os.environ.get('PGDATABASE')):
+        raise SkipStage("PGHOST/PGDATABASE not set; point them at a local Postgres to benchmark database calls")
+    import database
+
+    database.initialize_db()
+    symbols = [f"BENCH{i}" for i in range(100)]
+
+    def save_and_remove():
+        database.save_stocks_to_db(symbols)
+        database.remove_stocks_from_db(symbols)
+
+    yield Case('save_and_remove', "100 symbols", 100, save_and_remove)
+    yield Case('get_user_stocks cold', "watchlist", 1, database.get_user_stocks, database._invalidate_watchlist_cache)
+    yield Case('get_user_stocks warm', "watchlist", 1, database.get_user_stocks)
+
+def run_benchmarks(stages, repeat, quick):
+    import news_scraper
+    import stock_data
+
+    results = []
+    with fixtures.stub_server() as base_url, \
+            fixtures.patched(stock_data, 'yf', fixtures.fake_yfinance()), \
+            fixtures.patched(news_scraper, 'NEWS_URL_TEMPLATE', base_url + '/quote/{symbol}/news'), \
+            fixtures.patched(news_scraper, 'ARTICLE_BASE_URL', base_url):
+        for name in stages:
+            fresh_cache_dir()
+            FakeTicker.bars = dict(fixtures.DEFAULT_BARS)
+            try:
+                for case in STAGES[name](quick):
+                    result = {'stage': name, 'case': case.name, 'size': case.size}
+                    result.update(measure(case, repeat))
+                    results.append(result)
+                    print(f"{name:20} {case.name:22} {case.size:28} median {result['median_s'] * 1000:9.2f} ms  "
+                          f"peak {result['peak_memory_bytes'] / 1e6:8.2f} MB")
+            except SkipStage as e:
+                results.append({'stage': name, 'skipped': str(e)})
+                print(f"{name:20} skipped: {e}")
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, baseline_path):
+    """
+    Print the median latency of each case relative to a previous results file.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['case'], r['size']): r for r in json.load(f)['results'] if 'skipped' not in r}
+
+    print(f"\nCompared with {baseline_path} (ratio < 1 is faster):")
+    for result in results:
+        if 'skipped' in result:
+            continue
+        previous = baseline.get((result['stage'], result['case'], result['size']))
+        if previous is None:
+            continue
+        ratio = result['median_s'] / previous['median_s'] if previous['median_s'] else float('nan')
+        print(f"{result['stage']:20} {result['case']:22} {result['size']:28} {ratio:6.2f}x")
+
+def main():
+    global BENCH_ROOT
+    parser = argparse.ArgumentParser(description="Run the offline pipeline benchmarks.")
+    parser.add_argument('--output', default='bench_results.json', help="where to write the JSON results")
+    parser.add_argument('--repeat', type=int, default=5, help="timed repetitions per case")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help="stages to run")
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated upstream latency in milliseconds")
+    parser.add_argument('--quick', action='store_true', help="skip the largest data sizes")
+    parser.add_argument('--compare', help="previous results file to compare against")
+    args = parser.parse_args()
+
+    fixtures.UPSTREAM_LATENCY = args.latency / 1000
+    BENCH_ROOT = tempfile.mkdtemp(prefix='bench-')
+    try:
+        results = run_benchmarks(args.stages, args.repeat, args.quick)
+    finally:
+        shutil.rmtree(BENCH_ROOT, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': pd.Timestamp.now(tz='UTC').isoformat(),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'upstream_latency_ms': args.latency,
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+One-time process setup and startup timing.
+
+`run_once()` is called by the Streamlit app on every rerun but only does its
+work the first time in a process. Run this module directly to prepare data at
+build time or to report cold import times:
+
+    python bootstrap.py --download-data
+    python bootstrap.py --report
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Modules whose cold import time is included in the startup report
+REPORTED_MODULES = [
+    'streamlit',
+    'pandas',
+    'plotly.graph_objects',
+    'yfinance',
+    'stock_data',
+    'database',
+    'news_scraper',
+    'sentiment_analysis',
+    'economic_data',
+]
+
+# Port for the Prometheus /metrics endpoint; unset disables it
+METRICS_PORT = os.environ.get('METRICS_PORT')
+
+_bootstrapped = False
+_bootstrap_lock = threading.Lock()
+_timings = {}
+
+@contextmanager
+def timed(step):
+    """
+    Record how long a startup step took.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings[step] = time.perf_counter() - start
+
+def run_once():
+    """
+    Run one-time setup (database schema, lexicon check, metrics endpoint) once per process.
+    """
+    global _bootstrapped
+    if _bootstrapped:
+        return
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return
+
+        with timed('database schema'):
+            from database import initialize_db
+            initialize_db()
+
+        with timed('vader lexicon check'):
+            from sentiment_analysis import vader_lexicon_available, NLTK_DATA_DIR
+            if not vader_lexicon_available():
+                logging.warning(f"VADER lexicon not found in {NLTK_DATA_DIR} or NLTK's default locations; run `python bootstrap.py --download-data`")
+
+        if METRICS_PORT:
+            import metrics
+            try:
+                metrics.start_metrics_server(int(METRICS_PORT))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not serve metrics on port {METRICS_PORT}: {e}")
+
+        _bootstrapped = True
+        logging.info("Bootstrap finished: " + ", ".join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in _timings.items()))
+
+def get_startup_timings():
+    """
+    Return the duration in seconds of each bootstrap step run in this process.
+    """
+    return dict(_timings)
+
+def measure_import_times(modules=REPORTED_MODULES):
+    """
+    Measure the cold import time of each module in a fresh interpreter.
+
+    :return: Dictionary of module name -> seconds, or None if the import failed
+    """
+    report = {}
+    for module in modules:
+        code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        report[module] = float(result.stdout.strip()) if result.returncode == 0 else None
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare local data and report startup times.")
+    parser.add_argument('--download-data', action='store_true', help="download the VADER lexicon into the local NLTK data directory")
+    parser.add_argument('--report', action='store_true', help="print cold import and bootstrap times as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.download_data:
+        from sentiment_analysis import download_vader_lexicon
+        if not download_vader_lexicon():
+            sys.exit("Failed to download the VADER lexicon")
+
+    if args.report:
+        imports = measure_import_times()
+        run_once()
+        print(json.dumps({'imports': imports, 'bootstrap': get_startup_timings()}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Maximum number of candles sent to the browser for one chart
+CHART_CANDLE_BUDGET = 400
+# Number of reduced frames kept in memory
+CHART_CACHE_SIZE = 128
+
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+def downsample_ohlc(data, max_candles=CHART_CANDLE_BUDGET):
+    """
+    Aggregate consecutive OHLC bars so that at most `max_candles` remain.
+
+    Each candle keeps the first open, the true high and low, the last close and
+    the summed volume of the bars it replaces.
+
+    :param data: OHLCV DataFrame
+    :param max_candles: Candle budget
+    :return: DataFrame with the same OHLC(V) columns and at most `max_candles` rows
+    """
+    rows = len(data)
+    if rows <= max_candles:
+        return data
+
+    bucket = -(-rows // max_candles)
+    starts = np.arange(0, rows, bucket)
+    ends = np.minimum(starts + bucket, rows) - 1
+
+    columns = {
+        'Open': data['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(data['High'].to_numpy(), starts),
+        'Low': np.fmin.reduceat(data['Low'].to_numpy(), starts),
+        'Close': data['Close'].to_numpy()[ends],
+    }
+    if 'Volume' in data:
+        columns['Volume'] = np.add.reduceat(data['Volume'].to_numpy(), starts)
+    return pd.DataFrame(columns, index=data.index[starts])
+
+def _fingerprint(data):
+    """
+    Cheap content marker for a bar frame: its time range, its last bar and a
+    checksum of the closes, so revised or reconciled bars change the key.
+    """
+    last = data.iloc[-1]
+    return (len(data), data.index[0], data.index[-1],
+            tuple(float(last[column]) for column in ('Open', 'High', 'Low', 'Close', 'Volume') if column in data),
+            float(np.nansum(data['Close'].to_numpy(dtype='float64'))))
+
+def get_chart_data(symbol, period, data, start=None, end=None, max_candles=CHART_CANDLE_BUDGET):
+    """
+    Return the candles to draw for a chart, reduced to the candle budget and cached.
+
+    Zooming in with `start`/`end` re-reduces only the visible range, so a narrow
+    enough range is drawn at full resolution.
+
+    :param symbol: Stock symbol
+    :param period: Chart period the data belongs to
+    :param data: Full OHLCV DataFrame for the chart
+    :param start: Optional first timestamp to show
+    :param end: Optional last timestamp to show
+    :param max_candles: Candle budget
+    :return: DataFrame of candles
+    """
+    if data.empty:
+        return data
+
+    key = (symbol, period, max_candles, start, end, _fingerprint(data))
+    with _chart_cache_lock:
+        if key in _chart_cache:
+            _chart_cache.move_to_end(key)
+            return _chart_cache[key]
+
+    visible = data
+    if start is not None or end is not None:
+        visible = data.loc[start:end]
+    reduced = downsample_ohlc(visible, max_candles)
+
+    with _chart_cache_lock:
+        _chart_cache[key] = reduced
+        while len(_chart_cache) > CHART_CACHE_SIZE:
+            _chart_cache.popitem(last=False)
+    return reduced
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = '__index__.npy'
+META_FILE = 'meta.json'
+
+def write_frame(directory, df, meta=None):
+    """
+    Write a time-indexed DataFrame to `directory` as one .npy file per column.
+
+    The frame is written to a temporary directory first and then swapped in, so
+    readers never see a half-written store.
+
+    :param directory: Target directory for the frame
+    :param df: DataFrame with a DatetimeIndex and numeric columns
+    :param meta: Optional dictionary of extra metadata to store alongside the frame
+    """
+    tmp_dir = f"{directory}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_dir)
+
+    index = pd.DatetimeIndex(df.index)
+    np.save(os.path.join(tmp_dir, INDEX_FILE), index.as_unit('ns').asi8)
+    for position, column in enumerate(df.columns):
+        np.save(os.path.join(tmp_dir, f"col{position}.npy"), np.ascontiguousarray(df[column].to_numpy()))
+
+    stored_meta = dict(meta or {})
+    stored_meta['columns'] = [str(column) for column in df.columns]
+    stored_meta['tz'] = str(index.tz) if index.tz is not None else None
+    stored_meta['index_name'] = index.name
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump(stored_meta, f)
+
+    old_dir = None
+    if os.path.exists(directory):
+        old_dir = f"{directory}.{uuid.uuid4().hex}.old"
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+def read_meta(directory):
+    """
+    Read the metadata of a stored frame, or None if nothing is stored.
+    """
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def update_meta(directory, **changes):
+    """
+    Update the metadata of a stored frame without rewriting its columns.
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        return
+    meta.update(changes)
+    tmp_path = os.path.join(directory, f"{META_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+def read_frame(directory, start=None):
+    """
+    Read a frame written by `write_frame`.
+
+    Columns are memory-mapped, so only the rows at or after `start` are read.
+
+    :param directory: Directory the frame was written to
+    :param start: Optional timestamp; rows before it are skipped
+    :return: Tuple of (DataFrame, metadata), or (None, None) if nothing is stored
+    """
+    meta = read_meta(directory)
+    if meta is None:
+        return None, None
+    try:
+        index_values = np.load(os.path.join(directory, INDEX_FILE), mmap_mode='r')
+        first_row = 0
+        if start is not None:
+            start_ns = pd.Timestamp(start)
+            if start_ns.tzinfo is not None:
+                start_ns = start_ns.tz_convert('UTC').tz_localize(None)
+            first_row = int(np.searchsorted(index_values, start_ns.as_unit('ns').value))
+
+        index = pd.DatetimeIndex(np.asarray(index_values[first_row:]).view('datetime64[ns]'), name=meta['index_name'])
+        if meta['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(meta['tz'])
+
+        columns = {}
+        for position, column in enumerate(meta['columns']):
+            values = np.load(os.path.join(directory, f"col{position}.npy"), mmap_mode='r')
+            columns[column] = np.array(values[first_row:])
+    except (FileNotFoundError, ValueError):
+        # The store was swapped out underneath us; treat it as a miss.
+        return None, None
+
+    return pd.DataFrame(columns, index=index), meta
@@ -0,0 +1,260 @@
+"""
+Correlation and covariance of watchlist returns.
+
+Returns are aligned onto one (bars x symbols) matrix with NaN where a symbol has
+no bar. Statistics are pairwise-complete: each pair only uses the bars where both
+symbols have a return. They are built from four running sums, each an N x N
+matrix product over the valid mask V and the NaN-zeroed returns X:
+
+    count   = V^T V         bars where both i and j are valid
+    sum     = X^T V         sum of i's returns over those bars
+    sum_sq  = (X*X)^T V     sum of i's squared returns over those bars
+    cross   = X^T X         sum of i * j over those bars
+
+Adding or removing k bars costs O(k * N^2) and adding a symbol costs O(T * N),
+so the matrix never has to be recomputed from scratch when one bar or one
+symbol arrives.
+"""
+import threading
+import numpy as np
+import pandas as pd
+import metrics
+from stock_data import get_watchlist_closes
+
+# Bars a pair needs in common before its statistics are reported
+CORRELATION_MIN_PERIODS = 20
+
+_watchlist_state = {}
+_watchlist_lock = threading.Lock()
+
+def align_returns(closes, log_returns=True):
+    """
+    Turn a wide frame of closes into aligned per-bar returns.
+
+    :param closes: DataFrame indexed by time with one column per symbol
+    :param log_returns: Use log returns instead of simple returns
+    :return: float64 DataFrame of returns, NaN where a symbol has no bar
+    """
+    prices = closes.to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if log_returns:
+            returns = np.diff(np.log(prices), axis=0)
+        else:
+            returns = prices[1:] / prices[:-1] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return pd.DataFrame(returns, index=closes.index[1:], columns=closes.columns)
+
+def _sums(returns):
+    valid = (~np.isnan(returns)).astype('float64')
+    values = np.where(valid > 0, returns, 0.0)
+    return valid.T @ valid, values.T @ valid, (values * values).T @ valid, values.T @ values
+
+def _covariance(count, total, cross, min_periods):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (cross - total * total.T / count) / (count - 1)
+    cov[count < max(min_periods, 2)] = np.nan
+    return cov
+
+def _correlation(count, total, sum_sq, cross, min_periods):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        numerator = cross - total * total.T / count
+        # Variance of i over the bars it shares with j, and the same for j
+        spread = sum_sq - total * total / count
+        corr = numerator / np.sqrt(spread * spread.T)
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[count < max(min_periods, 2)] = np.nan
+    return corr
+
+def correlation_matrix(returns, min_periods=CORRELATION_MIN_PERIODS):
+    """
+    Pairwise-complete correlation of every pair of columns.
+
+    :param returns: DataFrame from `align_returns`
+    :param min_periods: Bars a pair needs in common, otherwise NaN
+    :return: Symbol x symbol DataFrame
+    """
+    count, total, sum_sq, cross = _sums(returns.to_numpy(dtype='float64'))
+    return pd.DataFrame(_correlation(count, total, sum_sq, cross, min_periods), index=returns.columns, columns=returns.columns)
+
+def covariance_matrix(returns, min_periods=CORRELATION_MIN_PERIODS):
+    """
+    Pairwise-complete sample covariance of every pair of columns.
+    """
+    count, total, _, cross = _sums(returns.to_numpy(dtype='float64'))
+    return pd.DataFrame(_covariance(count, total, cross, min_periods), index=returns.columns, columns=returns.columns)
+
+def rolling_correlation(returns, window, step=1, min_periods=CORRELATION_MIN_PERIODS):
+    """
+    Correlation matrices over a sliding window of `window` bars.
+
+    The window is slid `step` bars at a time by adding the entering bars and
+    removing the leaving ones from the running sums.
+
+    :return: Tuple of (array of shape (windows, N, N), index of each window's last bar)
+    """
+    values = returns.to_numpy(dtype='float64')
+    if len(values) < window:
+        return np.empty((0, values.shape[1], values.shape[1])), returns.index[:0]
+
+    running = RunningCorrelation(returns.columns)
+    running.add_bars(values[:window])
+    ends = list(range(window, len(values) + 1, step))
+    result = np.empty((len(ends), values.shape[1], values.shape[1]))
+    result[0] = running.correlation_values(min_periods)
+    for position, end in enumerate(ends[1:], start=1):
+        running.add_bars(values[end - step:end], window=window)
+        result[position] = running.correlation_values(min_periods)
+    return result, returns.index[[end - 1 for end in ends]]
+
+class RunningCorrelation:
+    """
+    Running sums for pairwise-complete correlation and covariance, updated in place.
+    """
+    def __init__(self, symbols=()):
+        self.symbols = list(symbols)
+        size = len(self.symbols)
+        self.returns = np.empty((0, size))
+        self.count = np.zeros((size, size))
+        self.sum = np.zeros((size, size))
+        self.sum_sq = np.zeros((size, size))
+        self.cross = np.zeros((size, size))
+
+    @classmethod
+    def from_returns(cls, returns):
+        """
+        Build the running sums from a returns DataFrame in one pass.
+        """
+        running = cls(returns.columns)
+        running.add_bars(returns.to_numpy(dtype='float64'))
+        return running
+
+    def _apply(self, rows, sign):
+        count, total, sum_sq, cross = _sums(rows)
+        self.count += sign * count
+        self.sum += sign * total
+        self.sum_sq += sign * sum_sq
+        self.cross += sign * cross
+
+    def add_bars(self, rows, window=None):
+        """
+        Add new bars, dropping the oldest ones beyond `window` bars.
+
+        :param rows: Array of shape (bars, symbols) in `self.symbols` order
+        :param window: Keep at most this many bars (default: keep all)
+        """
+        rows = np.asarray(rows, dtype='float64').reshape(-1, len(self.symbols))
+        self._apply(rows, 1)
+        self.returns = np.concatenate([self.returns, rows])
+        if window is not None and len(self.returns) > window:
+            self.remove_oldest(len(self.returns) - window)
+
+    def remove_oldest(self, bars):
+        self._apply(self.returns[:bars], -1)
+        self.returns = self.returns[bars:]
+
+    def remove_newest(self, bars):
+        if bars <= 0:
+            return
+        self._apply(self.returns[-bars:], -1)
+        self.returns = self.returns[:-bars]
+
+    def add_symbol(self, symbol, column):
+        """
+        Add a symbol whose returns are aligned to the bars already held.
+
+        :param column: Array with one return (or NaN) per held bar
+        """
+        column = np.asarray(column, dtype='float64').reshape(-1, 1)
+        valid = (~np.isnan(self.returns)).astype('float64')
+        values = np.where(valid > 0, self.returns, 0.0)
+        new_valid = (~np.isnan(column)).astype('float64')
+        new_values = np.where(new_valid > 0, column, 0.0)
+
+        def grow(matrix, row, col, corner):
+            return np.block([[matrix, col], [row, corner]])
+
+        self.count = grow(self.count, new_valid.T @ valid, valid.T @ new_valid, new_valid.T @ new_valid)
+        self.sum = grow(self.sum, new_values.T @ valid, values.T @ new_valid, new_values.T @ new_valid)
+        self.sum_sq = grow(self.sum_sq, (new_values * new_values).T @ valid, (values * values).T @ new_valid,
+                           (new_values * new_values).T @ new_valid)
+        self.cross = grow(self.cross, new_values.T @ values, values.T @ new_values, new_values.T @ new_values)
+        self.returns = np.concatenate([self.returns, column], axis=1)
+        self.symbols.append(symbol)
+
+    def remove_symbol(self, symbol):
+        position = self.symbols.index(symbol)
+        for name in ('count', 'sum', 'sum_sq', 'cross'):
+            matrix = getattr(self, name)
+            setattr(self, name, np.delete(np.delete(matrix, position, axis=0), position, axis=1))
+        self.returns = np.delete(self.returns, position, axis=1)
+        del self.symbols[position]
+
+    def correlation_values(self, min_periods=CORRELATION_MIN_PERIODS):
+        return _correlation(self.count, self.sum, self.sum_sq, self.cross, min_periods)
+
+    def correlation(self, min_periods=CORRELATION_MIN_PERIODS):
+        return pd.DataFrame(self.correlation_values(min_periods), index=self.symbols, columns=self.symbols)
+
+    def covariance(self, min_periods=CORRELATION_MIN_PERIODS):
+        values = _covariance(self.count, self.sum, self.cross, min_periods)
+        return pd.DataFrame(values, index=self.symbols, columns=self.symbols)
+
+def _update_state(state, returns):
+    """
+    Bring `state` up to date with `returns`, or return None if it can't be updated in place.
+    """
+    running, index = state
+    overlap = index.intersection(returns.index)
+    if overlap.empty or index[-1] > returns.index[-1]:
+        return None
+
+    # The last held bar may still have been forming; replace it and everything after it
+    running.remove_newest(len(index) - index.get_loc(overlap[-1]))
+    index = index[:len(running.returns)]
+    running.remove_oldest(int(index.searchsorted(returns.index[0])))
+    index = index[index >= returns.index[0]]
+    if not index.equals(returns.index[:len(index)]):
+        return None
+
+    for symbol in [symbol for symbol in running.symbols if symbol not in returns.columns]:
+        running.remove_symbol(symbol)
+    held = returns.iloc[:len(index)]
+    if not np.allclose(running.returns, held[running.symbols].to_numpy(), equal_nan=True):
+        return None
+    for symbol in returns.columns:
+        if symbol not in running.symbols:
+            running.add_symbol(symbol, held[symbol].to_numpy())
+
+    running.add_bars(returns[running.symbols].iloc[len(index):].to_numpy())
+    return running, returns.index
+
+def get_watchlist_correlation(symbols, period="6mo", interval="1d"):
+    """
+    Correlation and covariance of daily returns across a watchlist.
+
+    Closes come from the local bar store, so a rerun downloads nothing while the
+    stored bars are fresh. Running sums are kept per (period, interval) between
+    calls, so a new bar or a new symbol only updates them instead of rebuilding
+    the matrices.
+
+    :return: Tuple of (correlation DataFrame, covariance DataFrame, dict of symbol -> error message)
+    """
+    closes, failures = get_watchlist_closes(symbols, period=period, interval=interval)
+    if closes.empty:
+        return pd.DataFrame(), pd.DataFrame(), failures
+
+    with metrics.span('correlation'):
+        returns = align_returns(closes)
+        key = (period, interval)
+        with _watchlist_lock:
+            state = _watchlist_state.get(key)
+            if state is not None:
+                state = _update_state(state, returns)
+            metrics.cache_result('correlation', hit=state is not None)
+            if state is None:
+                state = (RunningCorrelation.from_returns(returns), returns.index)
+            _watchlist_state[key] = state
+            order = list(returns.columns)
+            corr = state[0].correlation().loc[order, order]
+            cov = state[0].covariance().loc[order, order]
+    return corr, cov, failures
@@ -1,6 +1,12 @@
+import logging
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
-from psycopg2 import sql
+from psycopg2 import pool, sql
+import metrics
 
 # Use environment variables for database connection
 db_params = {
@@ -11,76 +17,224 @@ db_params = {
     'port': os.environ.get('PGPORT')
 }
 
+# Connection pool configuration
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+DB_RETRIES = int(os.environ.get('DB_RETRIES', 3))
+DB_RETRY_DELAY = float(os.environ.get('DB_RETRY_DELAY', 0.2))
+# Connections idle for longer than this are pinged before being handed out
+DB_HEALTHCHECK_AFTER = 30
+
+# Symbols must fit the user_stocks.symbol column (VARCHAR(10)); letters, digits
+# and the separators Yahoo uses, e.g. BRK-B, BF.B, ^GSPC, EURUSD=X
+SYMBOL_MAX_LENGTH = 10
+SYMBOL_PATTERN = re.compile(r'[A-Z0-9][A-Z0-9.\-=]*|\^[A-Z0-9.\-=]+')
+
+# How long get_user_stocks may serve a cached watchlist (writes invalidate it)
+WATCHLIST_CACHE_TTL = 30
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_last_used = {}
+
+_initialized = False
+_initialize_lock = threading.Lock()
+
+_watchlist_cache = None
+_watchlist_generation = 0
+_watchlist_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **db_params)
+        return _pool
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    if time.monotonic() - _last_used.get(id(conn), 0) < DB_HEALTHCHECK_AFTER:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def _release(conn_pool, conn, broken=False):
+    if broken or conn.closed:
+        _last_used.pop(id(conn), None)
+        conn_pool.putconn(conn, close=True)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+        conn_pool.putconn(conn)
+
+@contextmanager
+def get_connection():
+    """
+    Borrow a healthy connection from the pool, waiting if all connections are in use.
+    """
+    with _pool_slots:
+        conn_pool = _get_pool()
+        while True:
+            conn = conn_pool.getconn()
+            if _is_healthy(conn):
+                break
+            _release(conn_pool, conn, broken=True)
+
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            _release(conn_pool, conn, broken)
+
+def _execute(operation):
+    """
+    Run `operation(cursor)` in a transaction on a pooled connection.
+
+    Connection failures are retried up to DB_RETRIES times on a fresh connection.
+    """
+    for attempt in range(DB_RETRIES):
+        try:
+            with metrics.span('db_call'), metrics.upstream_call('postgres'), get_connection() as conn:
+                with conn.cursor() as cur:
+                    result = operation(cur)
+                conn.commit()
+                return result
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if attempt == DB_RETRIES - 1:
+                raise
+            time.sleep(DB_RETRY_DELAY * (2 ** attempt))
+
+def _invalidate_watchlist_cache():
+    global _watchlist_cache, _watchlist_generation
+    with _watchlist_lock:
+        _watchlist_cache = None
+        _watchlist_generation += 1
+
+def _normalize_symbols(symbols):
+    return list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol and symbol.strip()))
+
 def initialize_db():
     """
     Initialize the database and create the necessary table.
+
+    Runs once per process; later calls return immediately.
     """
-    conn = psycopg2.connect(**db_params)
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS user_stocks (
-                id SERIAL PRIMARY KEY,
-                symbol VARCHAR(10) NOT NULL,
-                UNIQUE(symbol)
-            )
-        """)
-        conn.commit()
-    except Exception as e:
-        print(f"Error initializing database: {e}")
-    finally:
-        cur.close()
-        conn.close()
+    global _initialized
+    if _initialized:
+        return
+    with _initialize_lock:
+        if _initialized:
+            return
+        try:
+            _execute(lambda cur: cur.execute("""
+                CREATE TABLE IF NOT EXISTS user_stocks (
+                    id SERIAL PRIMARY KEY,
+                    symbol VARCHAR(10) NOT NULL,
+                    UNIQUE(symbol)
+                )
+            """))
+            _initialized = True
+        except Exception as e:
+            logging.error(f"Error initializing database: {e}")
+
+def _symbol_error(symbol):
+    if len(symbol) > SYMBOL_MAX_LENGTH:
+        return f"Longer than {SYMBOL_MAX_LENGTH} characters"
+    if not SYMBOL_PATTERN.fullmatch(symbol):
+        return "Not a valid ticker symbol"
+    return None
 
 def save_stock_to_db(symbol):
     """
     Save a stock symbol to the database.
+
+    :return: True if the symbol was saved
+    """
+    saved, _ = save_stocks_to_db([symbol])
+    return bool(saved)
+
+def save_stocks_to_db(symbols):
+    """
+    Save several stock symbols to the database in one statement.
+
+    Malformed symbols are rejected up front so they can't fail the whole batch.
+
+    :return: Tuple of (list of saved symbols, dict of rejected symbol -> reason)
     """
-    conn = psycopg2.connect(**db_params)
-    cur = conn.cursor()
-    
+    symbols = _normalize_symbols(symbols)
+    errors = {symbol: _symbol_error(symbol) for symbol in symbols}
+    rejected = {symbol: error for symbol, error in errors.items() if error is not None}
+    symbols = [symbol for symbol in symbols if symbol not in rejected]
+    if not symbols:
+        return [], rejected
     try:
-        cur.execute(
-            sql.SQL("INSERT INTO user_stocks (symbol) VALUES (%s) ON CONFLICT (symbol) DO NOTHING"),
-            [symbol]
-        )
-        conn.commit()
+        _execute(lambda cur: cur.execute(
+            sql.SQL("INSERT INTO user_stocks (symbol) SELECT unnest(%s::varchar[]) ON CONFLICT (symbol) DO NOTHING"),
+            [symbols]
+        ))
     except Exception as e:
-        print(f"Error saving stock to database: {e}")
+        logging.error(f"Error saving stocks to database: {e}")
+        rejected.update({symbol: "Database error" for symbol in symbols})
+        return [], rejected
     finally:
-        cur.close()
-        conn.close()
+        _invalidate_watchlist_cache()
+    return symbols, rejected
 
 def get_user_stocks():
     """
     Retrieve all tracked stock symbols from the database.
     """
-    conn = psycopg2.connect(**db_params)
-    cur = conn.cursor()
-    
-    try:
+    global _watchlist_cache
+    with _watchlist_lock:
+        hit = _watchlist_cache is not None and _watchlist_cache[0] > time.monotonic()
+        if hit:
+            symbols = _watchlist_cache[1]
+        generation = _watchlist_generation
+    metrics.cache_result('watchlist', hit)
+    if hit:
+        return list(symbols)
+
+    def fetch(cur):
         cur.execute("SELECT symbol FROM user_stocks")
         return [row[0] for row in cur.fetchall()]
+
+    try:
+        symbols = _execute(fetch)
     except Exception as e:
-        print(f"Error retrieving stocks from database: {e}")
+        logging.error(f"Error retrieving stocks from database: {e}")
         return []
-    finally:
-        cur.close()
-        conn.close()
+
+    with _watchlist_lock:
+        # Don't cache a read that raced with a write
+        if generation == _watchlist_generation:
+            _watchlist_cache = (time.monotonic() + WATCHLIST_CACHE_TTL, symbols)
+    return list(symbols)
 
 def remove_stock_from_db(symbol):
     """
     Remove a stock symbol from the database.
     """
-    conn = psycopg2.connect(**db_params)
-    cur = conn.cursor()
-    
+    remove_stocks_from_db([symbol])
+
+def remove_stocks_from_db(symbols):
+    """
+    Remove several stock symbols from the database in one statement.
+    """
+    symbols = _normalize_symbols(symbols)
+    if not symbols:
+        return
     try:
-        cur.execute("DELETE FROM user_stocks WHERE symbol = %s", [symbol])
-        conn.commit()
+        _execute(lambda cur: cur.execute("DELETE FROM user_stocks WHERE symbol = ANY(%s)", [symbols]))
     except Exception as e:
-        print(f"Error removing stock from database: {e}")
+        logging.error(f"Error removing stocks from database: {e}")
     finally:
-        cur.close()
-        conn.close()
+        _invalidate_watchlist_cache()
@@ -1,9 +1,115 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
 import streamlit as st
-from fredapi import Fred
 from datetime import datetime, timedelta
+from columnar_store import read_frame, read_meta, write_frame, update_meta
+from utils import get_cache_dir
+import metrics
 
-# Initialize FRED API client
-fred = Fred(api_key=st.secrets["FRED_API_KEY"])
+# Number of series fetched concurrently
+FRED_MAX_WORKERS = 6
+
+# How long a stored series is served before its release metadata is checked
+# again, keyed by FRED's short frequency code
+FRED_RECHECK_AFTER = {
+    'D': 6 * 60 * 60,
+    'W': 12 * 60 * 60,
+    'BW': 12 * 60 * 60,
+    'M': 24 * 60 * 60,
+    'Q': 24 * 60 * 60,
+    'SA': 24 * 60 * 60,
+    'A': 7 * 24 * 60 * 60,
+}
+DEFAULT_RECHECK_AFTER = 12 * 60 * 60
+
+_fred = None
+_fred_lock = threading.Lock()
+_series_locks = {}
+_series_locks_lock = threading.Lock()
+
+def get_fred_client():
+    """
+    Return the shared FRED API client, creating it on first use.
+    """
+    global _fred
+    with _fred_lock:
+        if _fred is None:
+            from fredapi import Fred
+            _fred = Fred(api_key=st.secrets["FRED_API_KEY"])
+        return _fred
+
+def _get_series_lock(indicator):
+    with _series_locks_lock:
+        return _series_locks.setdefault(indicator, threading.Lock())
+
+def _series_meta(info, start_date, checked_at):
+    return {
+        'start': start_date,
+        'last_updated': info.get('last_updated'),
+        'frequency': info.get('frequency_short'),
+        'checked_at': checked_at,
+    }
+
+def get_series(indicator, start_date, end_date):
+    """
+    Get a FRED series from the local store, fetching only new observations.
+
+    The series' release metadata is checked at most once per FRED_RECHECK_AFTER
+    period, and observations are only requested when FRED reports an update.
+
+    :param indicator: FRED series code
+    :param start_date: Start date (YYYY-MM-DD)
+    :param end_date: End date (YYYY-MM-DD)
+    :return: pandas Series of observations between the two dates
+    """
+    directory = os.path.join(get_cache_dir('fred'), indicator)
+
+    with metrics.span('fred_fetch'), _get_series_lock(indicator):
+        stored, meta = read_frame(directory)
+        now = time.time()
+
+        if stored is None or meta['start'] > start_date:
+            metrics.cache_result('fred', hit=False)
+            fred = get_fred_client()
+            with metrics.upstream_call('fred'):
+                info = fred.get_series_info(indicator)
+            with metrics.upstream_call('fred'):
+                series = fred.get_series(indicator, observation_start=start_date)
+            stored = series.to_frame('value')
+            write_frame(directory, stored, _series_meta(info, start_date, now))
+        elif now - meta['checked_at'] > FRED_RECHECK_AFTER.get(meta['frequency'], DEFAULT_RECHECK_AFTER):
+            fred = get_fred_client()
+            with metrics.upstream_call('fred'):
+                info = fred.get_series_info(indicator)
+            unchanged = info.get('last_updated') == meta['last_updated']
+            metrics.cache_result('fred', hit=unchanged)
+            if unchanged:
+                update_meta(directory, checked_at=now)
+            else:
+                # Refetch from the last stored observation to pick up its revision
+                tail_start = stored.index[-1].strftime('%Y-%m-%d') if not stored.empty else meta['start']
+                with metrics.upstream_call('fred'):
+                    tail = fred.get_series(indicator, observation_start=tail_start).to_frame('value')
+                if not tail.empty:
+                    stored = pd.concat([stored[stored.index < tail.index[0]], tail])
+                write_frame(directory, stored, _series_meta(info, meta['start'], now))
+        else:
+            metrics.cache_result('fred', hit=True)
+
+    series = stored['value']
+    series.name = None
+    return series[start_date:end_date]
+
+def get_series_frequency(indicator):
+    """
+    FRED's short frequency code ('D', 'W', 'M', 'Q', ...) of a stored series, or None if unknown.
+    """
+    meta = read_meta(os.path.join(get_cache_dir('fred'), indicator))
+    return meta.get('frequency') if meta else None
 
 def get_economic_indicators(indicators, start_date=None, end_date=None):
     """
@@ -18,16 +124,20 @@ def get_economic_indicators(indicators, start_date=None, end_date=None):
         start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
     if end_date is None:
         end_date = datetime.now().strftime('%Y-%m-%d')
-    
-    indicator_data = {}
-    for indicator in indicators:
+    if not indicators:
+        return {}
+
+    def fetch(indicator):
         try:
-            data = fred.get_series(indicator, start_date, end_date)
-            indicator_data[indicator] = data
+            return indicator, get_series(indicator, start_date, end_date)
         except Exception as e:
-            print(f"Error fetching {indicator}: {str(e)}")
-    
-    return indicator_data
+            logging.error(f"Error fetching {indicator}: {str(e)}")
+            return indicator, None
+
+    with ThreadPoolExecutor(max_workers=min(FRED_MAX_WORKERS, len(indicators))) as executor:
+        results = list(executor.map(metrics.in_current_trace(fetch), indicators))
+
+    return {indicator: data for indicator, data in results if data is not None}
 
 def get_relevant_economic_indicators(stock_symbol):
     """
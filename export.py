@@ -0,0 +1,126 @@
+import os
+import tempfile
+import zipfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows serialized per CSV chunk / Arrow record batch
+EXPORT_CHUNK_ROWS = 50_000
+
+def iter_csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yield a DataFrame as CSV text, `chunk_rows` rows at a time.
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=True, header=start == 0)
+
+def write_csv(df, fileobj):
+    """
+    Write a DataFrame as UTF-8 CSV to a binary file object in chunks.
+    """
+    for chunk in iter_csv_chunks(df):
+        fileobj.write(chunk.encode('utf-8'))
+
+def _to_arrow_table(df):
+    # Numeric columns without nulls are wrapped without copying
+    return pa.Table.from_pandas(df, preserve_index=True)
+
+def write_parquet(df, fileobj):
+    """
+    Write a DataFrame as Parquet to a binary file object.
+    """
+    pq.write_table(_to_arrow_table(df), fileobj, compression='zstd')
+
+def write_arrow(df, fileobj):
+    """
+    Write a DataFrame in the Arrow IPC file format, one record batch per chunk.
+    """
+    table = _to_arrow_table(df)
+    with pa.ipc.new_file(fileobj, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=EXPORT_CHUNK_ROWS):
+            writer.write_batch(batch)
+
+# format -> (file extension, MIME type, writer, needs pyarrow)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv', write_csv, False),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', write_parquet, True),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file', write_arrow, True),
+}
+
+def available_formats():
+    """
+    Return the export formats usable in this environment (Parquet and Arrow need pyarrow).
+    """
+    return [name for name, (_, _, _, needs_arrow) in EXPORT_FORMATS.items() if pa is not None or not needs_arrow]
+
+def get_format_details(fmt):
+    """
+    Return (file extension, MIME type) for an export format.
+    """
+    extension, mime, _, _ = EXPORT_FORMATS[fmt]
+    return extension, mime
+
+def _get_writer(fmt):
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format: {fmt}. Must be one of {available_formats()}")
+    return EXPORT_FORMATS[fmt][2]
+
+def _export_to_bytes(write):
+    """
+    Run `write(fileobj)` against a temporary file and return its contents.
+
+    The writers stream chunk by chunk into the file; it is read back in one go,
+    closed and removed before returning, so no file handle outlives the call.
+    """
+    fd, path = tempfile.mkstemp(prefix='export-')
+    try:
+        with os.fdopen(fd, 'w+b') as fileobj:
+            write(fileobj)
+            fileobj.seek(0)
+            return fileobj.read()
+    finally:
+        os.unlink(path)
+
+def export_frame(df, fmt='CSV'):
+    """
+    Serialize a DataFrame through a temporary file, chunk by chunk.
+
+    :param df: DataFrame to export
+    :param fmt: One of `available_formats()`
+    :return: The export as bytes
+    """
+    writer = _get_writer(fmt)
+    return _export_to_bytes(lambda fileobj: writer(df, fileobj))
+
+def export_to_path(df, path, fmt='CSV'):
+    """
+    Write a DataFrame to `path` in the given export format.
+    """
+    writer = _get_writer(fmt)
+    with open(path, 'wb') as fileobj:
+        writer(df, fileobj)
+
+def export_archive(frames, fmt='CSV'):
+    """
+    Export several DataFrames into one ZIP archive, one file per symbol.
+
+    :param frames: Dictionary of symbol -> DataFrame
+    :param fmt: One of `available_formats()`
+    :return: The archive as bytes
+    """
+    writer = _get_writer(fmt)
+    extension, _ = get_format_details(fmt)
+    compression = zipfile.ZIP_DEFLATED if fmt == 'CSV' else zipfile.ZIP_STORED
+
+    def write(fileobj):
+        with zipfile.ZipFile(fileobj, 'w', compression=compression) as archive:
+            for symbol, df in frames.items():
+                with archive.open(f"{symbol}.{extension}", 'w', force_zip64=True) as entry:
+                    writer(df, entry)
+
+    return _export_to_bytes(write)
@@ -0,0 +1,319 @@
+import numpy as np
+import pandas as pd
+import metrics
+
+SMA_WINDOWS = (50, 200)
+BOLLINGER_WINDOW = 20
+BOLLINGER_STD = 2
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_WINDOW = 14
+FIBONACCI_RATIOS = (0.0, 0.236, 0.382, 0.5, 0.618, 0.786, 1.0)
+
+# Closes kept in the state so rolling windows can be continued on new bars
+_TAIL_LENGTH = max(max(SMA_WINDOWS), BOLLINGER_WINDOW)
+
+_MACD_FAST_ALPHA = 2 / (MACD_FAST + 1)
+_MACD_SLOW_ALPHA = 2 / (MACD_SLOW + 1)
+_MACD_SIGNAL_ALPHA = 2 / (MACD_SIGNAL + 1)
+_RSI_ALPHA = 1 / RSI_WINDOW
+
+# Log bounds for the recurrence in _ewm_continue: a block of rows ends before its
+# cumulative product falls below exp(-_EWM_MAX_LOG), and a coefficient below
+# exp(-_EWM_MIN_LOG) is indistinguishable from zero in float64
+_EWM_MAX_LOG = 600.0
+_EWM_MIN_LOG = 40.0
+
+def _as_frame(values):
+    if values is None or isinstance(values, pd.DataFrame):
+        return values
+    return values.to_frame(name=values.name if values.name is not None else 'Close')
+
+def _ewm_state(values, result, alpha):
+    """
+    Carried state of `values.ewm(alpha=alpha, adjust=False)`: the last average and
+    the weight left on it, which decays by (1 - alpha) for every missing value
+    since the last observation.
+    """
+    if len(values) == 0:
+        return {'value': np.full(values.shape[1], np.nan), 'weight': np.ones(values.shape[1])}
+    observed = ~np.isnan(values)
+    trailing_missing = np.argmax(observed[::-1], axis=0)
+    trailing_missing[~observed.any(axis=0)] = 0
+    return {'value': result[-1].copy(), 'weight': (1 - alpha) ** trailing_missing}
+
+def _ewm_continue(values, alpha, state):
+    """
+    Continue `ewm(alpha=alpha, adjust=False).mean()` over new rows from its carried state.
+
+    Each observation updates the average as `y = c * y_prev + d`, where `c` depends
+    only on how many rows were missing since the previous observation, so the whole
+    chunk is solved as a linear recurrence with cumulative products of `c` and scaled
+    cumulative sums of `d`. Rows are taken in blocks small enough that the products
+    cannot underflow.
+
+    :param values: Array of shape (rows, symbols)
+    :return: Tuple of (averages of the same shape, new state)
+    """
+    rows = len(values)
+    weight0 = state['weight']
+    started0 = ~np.isnan(state['value'])
+    if rows == 0:
+        return values.copy(), {'value': state['value'].copy(), 'weight': weight0.copy()}
+
+    observed = ~np.isnan(values)
+    index = np.arange(rows)[:, None]
+    last = np.maximum.accumulate(np.where(observed, index, -1), axis=0)
+    previous = np.vstack([np.full((1, values.shape[1]), -1), last[:-1]])
+    decay = 1 - alpha
+    # Weight left on the running average when the row arrives
+    weight = np.where(previous >= 0, decay ** (index - previous), weight0 * decay ** (index + 1))
+    started = started0 | (previous >= 0)
+    update = observed & started
+    first = observed & ~started
+    coefficient = np.where(update, weight / (weight + alpha), np.where(first, 0.0, 1.0))
+    offset = np.where(update, alpha * np.where(observed, values, 0.0) / (weight + alpha),
+                      np.where(first, values, 0.0))
+
+    with np.errstate(divide='ignore'):
+        log_coefficient = np.maximum(np.log(coefficient), -_EWM_MIN_LOG)
+    cumulative = np.cumsum(log_coefficient, axis=0)
+    result = np.empty_like(values)
+    current = np.where(started0, state['value'], 0.0)
+    start = 0
+    while start < rows:
+        base = cumulative[start - 1] if start else np.zeros(values.shape[1])
+        drop = (base - cumulative[start:]).max(axis=1)
+        end = start + max(1, int(np.searchsorted(drop, _EWM_MAX_LOG, side='right')))
+        product = np.exp(cumulative[start:end] - base)
+        result[start:end] = product * (current + np.cumsum(offset[start:end] / product, axis=0))
+        current = result[end - 1]
+        start = end
+    result[~(started | observed)] = np.nan
+
+    final = last[-1]
+    new_weight = np.where(final >= 0, decay ** (rows - 1 - final),
+                          np.where(started0, weight0 * decay ** rows, weight0))
+    return result, {'value': result[-1].copy(), 'weight': new_weight}
+
+def _window_sums(tail):
+    """
+    Sum and missing-value count over each rolling window at the end of `tail`.
+    """
+    sums = {}
+    for window in set(SMA_WINDOWS) | {BOLLINGER_WINDOW}:
+        recent = tail[-window:]
+        sums[window] = (np.nansum(recent, axis=0), np.isnan(recent).sum(axis=0))
+    recent = tail[-BOLLINGER_WINDOW:]
+    return sums, np.nansum(recent * recent, axis=0)
+
+def compute_indicators(close, high=None, low=None, state=None):
+    """
+    Compute SMA 50/200, Bollinger Bands, MACD, RSI and SMA crossovers in one vectorized pass.
+
+    `close` may be a Series for one symbol or a wide DataFrame with one column per
+    symbol, so a whole universe is computed in a single call. When `state` from a
+    previous call is given, `close` (and `high`/`low`) must hold only the new bars;
+    indicators are continued from the carried EMA, Wilder-RSI and rolling-sum state
+    without revisiting earlier bars.
+
+    :param close: Closing prices (Series or DataFrame indexed by time)
+    :param high: Optional highs, used for Fibonacci levels
+    :param low: Optional lows, used for Fibonacci levels
+    :param state: State returned by a previous call, or None for a full computation
+    :return: Tuple of (indicators, state). For a Series input the indicators have one
+             column per indicator, otherwise (indicator, symbol) columns.
+    """
+    with metrics.span('indicator_computation'):
+        return _compute_indicators(close, high, low, state)
+
+def _compute_indicators(close, high, low, state):
+    is_series = isinstance(close, pd.Series)
+    close_frame = _as_frame(close).astype('float64')
+    high_frame = _as_frame(high)
+    low_frame = _as_frame(low)
+    if is_series:
+        # Keep the same column label across the three inputs
+        if high_frame is not None:
+            high_frame.columns = close_frame.columns
+        if low_frame is not None:
+            low_frame.columns = close_frame.columns
+
+    if state is not None:
+        if close_frame.empty:
+            return _empty_indicators(close_frame, is_series), state
+        indicators, new_state = _continue_indicators(close_frame, state)
+    else:
+        indicators, new_state = _full_indicators(close_frame)
+
+    highs = high_frame if high_frame is not None else close_frame
+    lows = low_frame if low_frame is not None else close_frame
+    if state is None:
+        new_state['high'] = highs.max()
+        new_state['low'] = lows.min()
+    else:
+        columns = state['columns']
+        new_state['high'] = pd.Series(np.fmax(np.fmax.reduce(highs[columns].to_numpy(), axis=0), state['high'].to_numpy()),
+                                      index=columns)
+        new_state['low'] = pd.Series(np.fmin(np.fmin.reduce(lows[columns].to_numpy(), axis=0), state['low'].to_numpy()),
+                                     index=columns)
+
+    if is_series:
+        indicators = indicators.droplevel(1, axis=1)
+    return indicators, new_state
+
+def _indicator_names():
+    return [f'SMA{SMA_WINDOWS[0]}', f'SMA{SMA_WINDOWS[1]}', 'BB_Middle', 'BB_Upper', 'BB_Lower',
+            'MACD', 'MACD_Signal', 'MACD_Hist', 'RSI', 'SMA_Cross']
+
+def _empty_indicators(close_frame, is_series):
+    columns = pd.MultiIndex.from_product([_indicator_names(), close_frame.columns])
+    indicators = pd.DataFrame(index=close_frame.index, columns=columns, dtype='float64')
+    indicators['SMA_Cross'] = indicators['SMA_Cross'].astype('int8')
+    return indicators.droplevel(1, axis=1) if is_series else indicators
+
+def _full_indicators(close_frame):
+    history = close_frame
+    sma = {window: history.rolling(window).mean() for window in SMA_WINDOWS}
+    bb_mean = history.rolling(BOLLINGER_WINDOW).mean()
+    bb_std = history.rolling(BOLLINGER_WINDOW).std(ddof=0)
+
+    ema_fast = history.ewm(alpha=_MACD_FAST_ALPHA, adjust=False).mean()
+    ema_slow = history.ewm(alpha=_MACD_SLOW_ALPHA, adjust=False).mean()
+    macd = ema_fast - ema_slow
+    macd_signal = macd.ewm(alpha=_MACD_SIGNAL_ALPHA, adjust=False).mean()
+
+    delta = history.diff()
+    gains = delta.clip(lower=0)
+    losses = -delta.clip(upper=0)
+    avg_gain = gains.ewm(alpha=_RSI_ALPHA, adjust=False).mean()
+    avg_loss = losses.ewm(alpha=_RSI_ALPHA, adjust=False).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    fast_sma, slow_sma = sma[SMA_WINDOWS[0]], sma[SMA_WINDOWS[1]]
+    spread = fast_sma - slow_sma
+    above = np.sign(spread)
+    # +1 where the fast SMA crosses above the slow one, -1 where it crosses below
+    crossover = np.sign(above - above.shift(1)).where(spread.notna() & spread.shift(1).notna(), 0).fillna(0)
+
+    indicators = pd.concat({
+        f'SMA{SMA_WINDOWS[0]}': fast_sma,
+        f'SMA{SMA_WINDOWS[1]}': slow_sma,
+        'BB_Middle': bb_mean,
+        'BB_Upper': bb_mean + BOLLINGER_STD * bb_std,
+        'BB_Lower': bb_mean - BOLLINGER_STD * bb_std,
+        'MACD': macd,
+        'MACD_Signal': macd_signal,
+        'MACD_Hist': macd - macd_signal,
+        'RSI': rsi,
+        'SMA_Cross': crossover.astype('int8'),
+    }, axis=1)
+
+    # The tail is padded with NaN so windows that were never full stay incomplete
+    values = history.to_numpy()
+    tail = np.full((_TAIL_LENGTH, values.shape[1]), np.nan)
+    kept = values[-_TAIL_LENGTH:]
+    tail[_TAIL_LENGTH - len(kept):] = kept
+    sums, bollinger_squares = _window_sums(tail)
+    state = {
+        'columns': close_frame.columns,
+        'indicator_columns': indicators.columns,
+        'tail': tail,
+        'sums': sums,
+        'bollinger_squares': bollinger_squares,
+        'spread': spread.to_numpy()[-1] if len(spread) else np.full(values.shape[1], np.nan),
+        'ema_fast': _ewm_state(values, ema_fast.to_numpy(), _MACD_FAST_ALPHA),
+        'ema_slow': _ewm_state(values, ema_slow.to_numpy(), _MACD_SLOW_ALPHA),
+        'macd_signal': _ewm_state(macd.to_numpy(), macd_signal.to_numpy(), _MACD_SIGNAL_ALPHA),
+        'avg_gain': _ewm_state(gains.to_numpy(), avg_gain.to_numpy(), _RSI_ALPHA),
+        'avg_loss': _ewm_state(losses.to_numpy(), avg_loss.to_numpy(), _RSI_ALPHA),
+    }
+    return indicators, state
+
+def _continue_indicators(close_frame, state):
+    values = close_frame[state['columns']].to_numpy()
+    rows = len(values)
+    combined = np.vstack([state['tail'], values])
+
+    # Rolling sums advanced by the entering values minus the ones leaving the window
+    entering = np.nan_to_num(values)
+    entering_missing = np.isnan(values)
+    means = {}
+    sums = {}
+    for window, (total, missing) in state['sums'].items():
+        leaving = combined[_TAIL_LENGTH - window:_TAIL_LENGTH - window + rows]
+        total = total + np.cumsum(entering - np.nan_to_num(leaving), axis=0)
+        missing = missing + np.cumsum(entering_missing.astype('int64') - np.isnan(leaving), axis=0)
+        means[window] = np.where(missing == 0, total / window, np.nan)
+        sums[window] = (total[-1], missing[-1])
+    leaving = combined[_TAIL_LENGTH - BOLLINGER_WINDOW:_TAIL_LENGTH - BOLLINGER_WINDOW + rows]
+    squares = state['bollinger_squares'] + np.cumsum(entering ** 2 - np.nan_to_num(leaving) ** 2, axis=0)
+    bb_mean = means[BOLLINGER_WINDOW]
+    with np.errstate(invalid='ignore'):
+        bb_std = np.sqrt(np.maximum(squares / BOLLINGER_WINDOW - bb_mean ** 2, 0))
+
+    ema_fast, ema_fast_state = _ewm_continue(values, _MACD_FAST_ALPHA, state['ema_fast'])
+    ema_slow, ema_slow_state = _ewm_continue(values, _MACD_SLOW_ALPHA, state['ema_slow'])
+    macd = ema_fast - ema_slow
+    macd_signal, macd_signal_state = _ewm_continue(macd, _MACD_SIGNAL_ALPHA, state['macd_signal'])
+
+    delta = np.diff(combined[_TAIL_LENGTH - 1:], axis=0)
+    avg_gain, avg_gain_state = _ewm_continue(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)),
+                                             _RSI_ALPHA, state['avg_gain'])
+    avg_loss, avg_loss_state = _ewm_continue(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)),
+                                             _RSI_ALPHA, state['avg_loss'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    fast_sma, slow_sma = means[SMA_WINDOWS[0]], means[SMA_WINDOWS[1]]
+    spread = np.vstack([state['spread'], fast_sma - slow_sma])
+    with np.errstate(invalid='ignore'):
+        crossover = np.sign(np.diff(np.sign(spread), axis=0))
+    crossover[np.isnan(spread[1:]) | np.isnan(spread[:-1])] = 0
+
+    blocks = [fast_sma, slow_sma, bb_mean, bb_mean + BOLLINGER_STD * bb_std, bb_mean - BOLLINGER_STD * bb_std,
+              macd, macd_signal, macd - macd_signal, rsi]
+    floats = np.hstack(blocks)
+    indicators = pd.concat([
+        pd.DataFrame(floats, index=close_frame.index),
+        pd.DataFrame(crossover.astype('int8'), index=close_frame.index,
+                     columns=pd.RangeIndex(floats.shape[1], floats.shape[1] + crossover.shape[1])),
+    ], axis=1)
+    indicators.columns = state['indicator_columns']
+
+    new_state = {
+        'columns': state['columns'],
+        'indicator_columns': state['indicator_columns'],
+        'tail': combined[-_TAIL_LENGTH:],
+        'sums': sums,
+        'bollinger_squares': squares[-1],
+        'spread': spread[-1],
+        'ema_fast': ema_fast_state,
+        'ema_slow': ema_slow_state,
+        'macd_signal': macd_signal_state,
+        'avg_gain': avg_gain_state,
+        'avg_loss': avg_loss_state,
+    }
+    return indicators, new_state
+
+def fibonacci_levels(state):
+    """
+    Fibonacci retracement levels between the highest high and lowest low seen so far.
+
+    :param state: State returned by `compute_indicators`
+    :return: DataFrame with one row per retracement ratio and one column per symbol
+    """
+    ratios = np.asarray(FIBONACCI_RATIOS)
+    high = state['high'].to_numpy()
+    low = state['low'].to_numpy()
+    levels = high[np.newaxis, :] - ratios[:, np.newaxis] * (high - low)[np.newaxis, :]
+    return pd.DataFrame(levels, index=pd.Index(FIBONACCI_RATIOS, name='ratio'), columns=state['high'].index)
+
+def add_indicators(data):
+    """
+    Return a copy of an OHLCV DataFrame with the indicator columns appended.
+    """
+    indicators, _ = compute_indicators(data['Close'], data['High'], data['Low'])
+    return data.join(indicators)
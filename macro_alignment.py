@@ -0,0 +1,167 @@
+"""
+Line FRED series up with price bars without look-ahead.
+
+FRED dates an observation by the start of its period, but the value is only
+published some time after the period ends. Each observation is therefore given
+an availability time (period start + period length + release lag, per FRED
+frequency), all series are merged into one table of release events, and that
+table is as-of joined onto the bars in a single `merge_asof`: every bar sees the
+latest value of each series that had been released by then.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import metrics
+from correlation import correlation_matrix
+from economic_data import get_economic_indicators, get_series_frequency
+from stock_data import get_daily_history
+
+# Length of one observation period, keyed by FRED's short frequency code
+PERIOD_LENGTH = {
+    'D': pd.DateOffset(days=1),
+    'W': pd.DateOffset(weeks=1),
+    'BW': pd.DateOffset(weeks=2),
+    'M': pd.DateOffset(months=1),
+    'Q': pd.DateOffset(months=3),
+    'SA': pd.DateOffset(months=6),
+    'A': pd.DateOffset(years=1),
+}
+# Conservative delay between the end of a period and the release of its value
+RELEASE_LAG = {
+    'D': pd.DateOffset(days=1),
+    'W': pd.DateOffset(days=3),
+    'BW': pd.DateOffset(days=3),
+    'M': pd.DateOffset(days=30),
+    'Q': pd.DateOffset(days=30),
+    'SA': pd.DateOffset(days=60),
+    'A': pd.DateOffset(days=90),
+}
+# Used when a series' frequency is not known
+DEFAULT_FREQUENCY = 'M'
+
+# Resampling rules offered for the aligned frame
+RESAMPLE_RULES = {'Daily': None, 'Weekly': 'W-FRI', 'Monthly': 'ME'}
+MACRO_CACHE_SIZE = 64
+
+_macro_cache = OrderedDict()
+_macro_cache_lock = threading.Lock()
+
+def release_times(dates, frequency):
+    """
+    Earliest time each observation could have been known.
+
+    :param dates: DatetimeIndex of FRED observation dates
+    :param frequency: FRED short frequency code
+    """
+    if frequency not in PERIOD_LENGTH:
+        frequency = DEFAULT_FREQUENCY
+    return dates + PERIOD_LENGTH[frequency] + RELEASE_LAG[frequency]
+
+def _release_events(series, frequencies):
+    """
+    Combine every series into one table indexed by release time, holding the
+    latest released value of each series at every release.
+    """
+    observations = pd.concat({indicator: values.dropna() for indicator, values in series.items()},
+                             names=['indicator', 'date']).reset_index(name='value')
+    observations['frequency'] = observations['indicator'].map(frequencies).where(
+        lambda codes: codes.isin(list(PERIOD_LENGTH)), DEFAULT_FREQUENCY)
+    available_at = pd.Series(pd.NaT, index=observations.index, dtype='datetime64[ns]')
+    for frequency, group in observations.groupby('frequency').groups.items():
+        available_at[group] = release_times(pd.DatetimeIndex(observations.loc[group, 'date']), frequency)
+    observations['available_at'] = available_at
+
+    observations = observations.sort_values(['available_at', 'date'], kind='stable')
+    events = observations.pivot_table(index='available_at', columns='indicator', values='value', aggfunc='last')
+    return events.ffill()
+
+def align_macro(prices, series, frequencies, rule=None):
+    """
+    As-of join FRED series onto price bars, using only values released before each bar.
+
+    :param prices: OHLCV DataFrame indexed by bar time
+    :param series: Dictionary of indicator -> observations (pandas Series indexed by date)
+    :param frequencies: Dictionary of indicator -> FRED short frequency code
+    :param rule: Optional pandas resampling rule for the bars, e.g. 'W-FRI' or 'ME'
+    :return: DataFrame with Close, Return (log) and one column per indicator
+    """
+    bars = prices[['Close']]
+    if rule is not None:
+        bars = bars.resample(rule).last().dropna()
+    bars = bars.assign(Return=np.log(bars['Close']).diff())
+
+    series = {indicator: values for indicator, values in series.items() if values is not None and not values.dropna().empty}
+    if not series or bars.empty:
+        return bars
+
+    events = _release_events(series, frequencies)
+    tz = bars.index.tz
+    events.index = events.index.tz_localize(tz) if tz is not None else events.index
+    events.index = events.index.astype(bars.index.dtype)
+
+    time_column = bars.index.name or 'Date'
+    left = bars.rename_axis(time_column).reset_index()
+    aligned = pd.merge_asof(left, events, left_on=time_column, right_index=True, direction='backward')
+    return aligned.set_index(time_column)[['Close', 'Return'] + list(events.columns)]
+
+def lagged_correlations(aligned, lags=range(0, 13), min_periods=10):
+    """
+    Correlation between each macro series' change in a bar and the stock's return `lag` bars later.
+
+    :param aligned: DataFrame from `align_macro`
+    :param lags: Leads of the return, in bars
+    :return: DataFrame indexed by lag with one column per indicator
+    """
+    indicators = [column for column in aligned.columns if column not in ('Close', 'Return')]
+    lags = list(lags)
+    if not indicators or not lags:
+        return pd.DataFrame(index=pd.Index(lags, name='lag'), columns=indicators, dtype='float64')
+
+    returns = aligned['Return'].to_numpy(dtype='float64')
+    padded = np.concatenate([returns, np.full(max(lags), np.nan)])
+    # Column k holds the return k bars after each row
+    future = np.lib.stride_tricks.sliding_window_view(padded, max(lags) + 1)[:len(returns), lags]
+
+    changes = aligned[indicators].diff().to_numpy(dtype='float64')
+    columns = indicators + [f"lag {lag}" for lag in lags]
+    corr = correlation_matrix(pd.DataFrame(np.hstack([changes, future]), columns=columns), min_periods)
+    result = corr.loc[columns[len(indicators):], indicators]
+    result.index = pd.Index(lags, name='lag')
+    return result
+
+def get_aligned_macro(symbol, indicators, period="2y", rule=None):
+    """
+    Daily bars of `symbol` with the given FRED series aligned onto them, cached.
+
+    The aligned frame is cached per (symbol, period, resampling rule, indicator set)
+    and reused while neither the bars nor the stored series have changed.
+
+    :return: DataFrame from `align_macro`
+    """
+    prices = get_daily_history(symbol, period)
+    start = prices.index[0] - pd.DateOffset(years=1)
+    series = get_economic_indicators(list(indicators), start_date=start.strftime('%Y-%m-%d'))
+    fingerprint = (len(prices), prices.index[-1],
+                   tuple((indicator, len(values), values.index[-1] if len(values) else None)
+                         for indicator, values in sorted(series.items())))
+
+    key = (symbol, period, rule, tuple(sorted(indicators)))
+    with _macro_cache_lock:
+        cached = _macro_cache.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            _macro_cache.move_to_end(key)
+            metrics.cache_result('macro_alignment', hit=True)
+            return cached[1]
+    metrics.cache_result('macro_alignment', hit=False)
+
+    with metrics.span('macro_alignment'):
+        frequencies = {indicator: get_series_frequency(indicator) for indicator in series}
+        aligned = align_macro(prices, series, frequencies, rule)
+
+    with _macro_cache_lock:
+        _macro_cache[key] = (fingerprint, aligned)
+        _macro_cache.move_to_end(key)
+        while len(_macro_cache) > MACRO_CACHE_SIZE:
+            _macro_cache.popitem(last=False)
+    return aligned
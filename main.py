@@ -1,26 +1,330 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from stock_data import get_stock_data, get_stock_info, get_advanced_stock_data, InvalidStockSymbolError
-from news_scraper import get_news_articles
-from database import initialize_db, save_stock_to_db, get_user_stocks, remove_stock_from_db
-from utils import convert_to_csv
-from economic_data import get_economic_indicators, get_relevant_economic_indicators
-from sentiment_analysis import analyze_news_sentiment
-from fredapi import Fred
+from stock_data import get_stock_info, get_advanced_stock_data, get_watchlist_history, get_watchlist_quotes, calculate_support_resistance, InvalidStockSymbolError
+from support_resistance import detect_levels, nearest_levels
+from chart_data import get_chart_data, CHART_CANDLE_BUDGET
+from database import save_stock_to_db, save_stocks_to_db, get_user_stocks, remove_stocks_from_db
+from export import available_formats, export_frame, export_archive, get_format_details
+from bootstrap import run_once
+import background
+import metrics
+import price_cache
 import socket
 import traceback
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-initialize_db()
+NEWS_ARTICLES_SHOWN = 5
+# Seconds between checks for background news and sentiment results
+NEWS_POLL_INTERVAL = 1
+CHART_PERIODS = ["1m", "5m", "15m", "30m", "1hr", "24hr", "3month", "1year"]
+# Adjacent periods are prefetched at most this often per symbol, in seconds
+CHART_PREFETCH_TTL = 300
+
+# The previous rerun's trace also collects spans from background work it started
+previous_trace = st.session_state.get('trace')
+st.session_state['trace'] = metrics.start_trace()
+run_once()
 
 st.set_page_config(page_title="Stock Data Visualization", page_icon="assets/favicon.svg", layout="wide")
 
 st.title("Stock Data Retrieval and Visualization Tool")
 
+show_timings = st.sidebar.checkbox("Show timing debug panel")
+
+def prefetch_adjacent_periods(stock_symbol, time_period):
+    """
+    Warm the bar store for the periods next to the selected one.
+    """
+    position = CHART_PERIODS.index(time_period)
+    for period in CHART_PERIODS[max(position - 1, 0):position + 2]:
+        if period != time_period:
+            background.prefetch(('bars', stock_symbol, period), get_advanced_stock_data, stock_symbol, period,
+                                max_age=CHART_PREFETCH_TTL)
+
+@st.fragment
+def render_chart(stock_symbol):
+    """
+    Chart section. Changing its widgets reruns only this function, not the whole page.
+    """
+    st.subheader("Stock Price Chart")
+    time_period = st.selectbox("Select time period", CHART_PERIODS)
+    try:
+        chart_data = get_advanced_stock_data(stock_symbol, period=time_period)
+        prefetch_adjacent_periods(stock_symbol, time_period)
+
+        show_support = st.checkbox("Show Support Line", value=True)
+        show_resistance = st.checkbox("Show Resistance Line", value=True)
+
+        if chart_data is not None and not chart_data.empty:
+            import plotly.graph_objects as go
+
+            zoom_start, zoom_end = None, None
+            if len(chart_data) > CHART_CANDLE_BUDGET:
+                bar_times = chart_data.index.tz_localize(None) if chart_data.index.tz is not None else chart_data.index
+                first_bar, last_bar = bar_times[0].to_pydatetime(), bar_times[-1].to_pydatetime()
+                zoom_start, zoom_end = st.slider(
+                    "Zoom range",
+                    min_value=first_bar,
+                    max_value=last_bar,
+                    value=(first_bar, last_bar),
+                    format="YYYY-MM-DD HH:mm"
+                )
+                zoom_start = pd.Timestamp(zoom_start).tz_localize(chart_data.index.tz)
+                zoom_end = pd.Timestamp(zoom_end).tz_localize(chart_data.index.tz)
+            candles = get_chart_data(stock_symbol, time_period, chart_data, zoom_start, zoom_end)
+            visible_bars = len(chart_data.loc[zoom_start:zoom_end])
+            if len(candles) < visible_bars:
+                st.caption(f"Showing {len(candles)} candles aggregated from {visible_bars} bars. Narrow the zoom range for full resolution.")
+
+            fig = go.Figure()
+            fig.add_trace(go.Candlestick(
+                x=candles.index,
+                open=candles['Open'],
+                high=candles['High'],
+                low=candles['Low'],
+                close=candles['Close'],
+                name="Price"
+            ))
+
+            support, resistance = nearest_levels(detect_levels(chart_data), chart_data['Close'].iloc[-1])
+            if support is None or resistance is None:
+                fallback_support, fallback_resistance = calculate_support_resistance(chart_data)
+                support = fallback_support if support is None else support
+                resistance = fallback_resistance if resistance is None else resistance
+
+            if show_support:
+                fig.add_hline(y=support, line_dash="dash", line_color="green", annotation_text="Support")
+            if show_resistance:
+                fig.add_hline(y=resistance, line_dash="dash", line_color="red", annotation_text="Resistance")
+
+            fig.update_layout(height=600, title=f"{stock_symbol} Stock Price")
+            st.plotly_chart(fig, use_container_width=True)
+
+            export_format = st.selectbox("Export format", available_formats(), key="chart_export_format")
+            extension, mime = get_format_details(export_format)
+            # Serialized only on request, not on every chart rerun
+            if st.button("Prepare Download", key="chart_prepare_export"):
+                st.download_button(
+                    label=f"Download {export_format}",
+                    data=export_frame(chart_data, export_format),
+                    file_name=f"{stock_symbol}_stock_data.{extension}",
+                    mime=mime
+                )
+        else:
+            st.warning(f"No data available for {stock_symbol} with the selected time period.")
+    except InvalidStockSymbolError as ise:
+        st.error(f"Error: {str(ise)}")
+        logging.error(f"Error fetching chart data: {str(ise)}")
+    except Exception as e:
+        st.error(f"An unexpected error occurred while fetching chart data: {str(e)}")
+        logging.error(f"Unexpected error fetching chart data: {str(e)}")
+        logging.error(traceback.format_exc())
+
+def get_news_tasks(stock_symbol):
+    """
+    Start (or reuse) the background news scrape and, once it is done, the sentiment scoring.
+
+    :return: Tuple of (news future, sentiment future or None)
+    """
+    from news_scraper import get_news_articles
+    from sentiment_analysis import analyze_news_sentiment
+
+    news = background.submit(('news', stock_symbol), get_news_articles, stock_symbol)
+    if not news.done():
+        return news, None
+    articles = background.result_if_done(news) or []
+    shown = [dict(article) for article in articles[:NEWS_ARTICLES_SHOWN]]
+    # Keyed on the articles, so a refreshed scrape gets scored again
+    urls = tuple(article['url'] for article in shown)
+    return news, background.submit(('sentiment', stock_symbol, urls), analyze_news_sentiment, shown)
+
+def render_news(stock_symbol):
+    news, sentiment = get_news_tasks(stock_symbol)
+    if sentiment is None:
+        st.info("Loading news articles...")
+        return
+
+    from sentiment_analysis import vader_lexicon_available
+    if not vader_lexicon_available():
+        st.warning("Sentiment scores are unavailable because the VADER lexicon is not installed. "
+                   "Run `python bootstrap.py --download-data` and restart the app.")
+
+    articles = background.result_if_done(sentiment)
+    if articles is None:
+        articles = (background.result_if_done(news) or [])[:NEWS_ARTICLES_SHOWN]
+        if not sentiment.done():
+            st.caption("Scoring sentiment...")
+        else:
+            st.caption("Sentiment scoring failed; showing articles without scores.")
+    for article in articles:
+        st.markdown(f"[{article['title']}]({article['url']})")
+        st.write(article['description'])
+        if 'sentiment' in article:
+            sentiment_scores = article['sentiment']
+            st.write(f"Sentiment: Positive: {sentiment_scores['pos']:.2f}, Negative: {sentiment_scores['neg']:.2f}, Neutral: {sentiment_scores['neu']:.2f}")
+            st.progress((sentiment_scores['compound'] + 1) / 2, text="Sentiment Score")
+        st.write("---")
+
+@st.fragment
+def render_correlation(watchlist):
+    """
+    Correlation / covariance heatmap of the watchlist's daily returns.
+    """
+    st.subheader("Correlation")
+    if len(watchlist) < 2:
+        st.info("Add at least two stocks to see how they move together.")
+        return
+
+    corr_col1, corr_col2 = st.columns(2)
+    corr_period = corr_col1.selectbox("Returns period", ["3mo", "6mo", "1y", "2y"], index=1, key="correlation_period")
+    statistic = corr_col2.selectbox("Statistic", ["Correlation", "Covariance"], key="correlation_statistic")
+    from correlation import get_watchlist_correlation
+    corr, cov, _ = get_watchlist_correlation(watchlist, period=corr_period)
+    matrix = corr if statistic == "Correlation" else cov
+    if matrix.empty:
+        st.warning("Not enough price history to compute correlations.")
+        return
+
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(),
+        x=matrix.columns,
+        y=matrix.index,
+        colorscale="RdBu",
+        reversescale=True,
+        zmid=0,
+        zmin=-1 if statistic == "Correlation" else None,
+        zmax=1 if statistic == "Correlation" else None,
+    ))
+    fig.update_layout(height=max(400, 18 * len(matrix)), title=f"{statistic} of daily log returns ({corr_period})")
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def render_backtest(watchlist):
+    """
+    SMA-crossover parameter sweep over the whole watchlist.
+    """
+    st.subheader("SMA Crossover Backtest")
+    with st.form("backtest_form"):
+        fast_range = st.slider("Fast SMA window", 2, 100, (5, 50))
+        slow_range = st.slider("Slow SMA window", 10, 300, (20, 200))
+        bt_col1, bt_col2, bt_col3 = st.columns(3)
+        step = bt_col1.number_input("Window step", min_value=1, max_value=50, value=5)
+        backtest_period = bt_col2.selectbox("History", ["1y", "2y", "5y", "10y"], index=1)
+        cost_bps = bt_col3.number_input("Cost per trade (bps)", min_value=0.0, max_value=100.0, value=5.0)
+        submitted = st.form_submit_button("Run Backtest")
+
+    if submitted:
+        from backtest import run_watchlist_sweep, summarize_sweep
+        fast_windows = range(fast_range[0], fast_range[1] + 1, step)
+        slow_windows = range(slow_range[0], slow_range[1] + 1, step)
+        table, backtest_failures = run_watchlist_sweep(watchlist, fast_windows, slow_windows, period=backtest_period, cost=cost_bps / 10000)
+        st.session_state['backtest_results'] = (table, backtest_failures, summarize_sweep(table) if not table.empty else None)
+
+    if 'backtest_results' not in st.session_state:
+        return
+    table, backtest_failures, summary = st.session_state['backtest_results']
+    if backtest_failures:
+        st.warning(f"Could not backtest: {', '.join(sorted(backtest_failures))}")
+    if summary is None:
+        st.warning("No results. Check that the slow windows fit in the selected history.")
+        return
+
+    best, pairs = summary
+    st.write(f"{table[['fast', 'slow']].drop_duplicates().shape[0]} window pairs across {len(best)} symbols")
+    st.write("Best pair per symbol")
+    st.dataframe(best.style.format({
+        'total_return': "{:+.2%}",
+        'max_drawdown': "{:.2%}",
+        'exposure': "{:.0%}",
+    }), use_container_width=True)
+
+    st.write("Median total return across the watchlist")
+    grid = pairs['total_return'].unstack('slow')
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(),
+        x=grid.columns,
+        y=grid.index,
+        colorscale="RdYlGn",
+        zmid=0,
+        colorbar=dict(tickformat="+.0%"),
+    ))
+    fig.update_layout(height=500, xaxis_title="Slow window", yaxis_title="Fast window")
+    st.plotly_chart(fig, use_container_width=True)
+
+    extension, mime = get_format_details("CSV")
+    if st.button("Prepare Download", key="backtest_prepare_export"):
+        st.download_button(
+            label="Download full results (CSV)",
+            data=export_frame(table, "CSV"),
+            file_name=f"backtest_results.{extension}",
+            mime=mime
+        )
+
+@st.fragment
+def render_macro(stock_symbol):
+    """
+    Economic indicators aligned with the stock's daily bars, and their lagged correlation with returns.
+    """
+    from economic_data import get_relevant_economic_indicators
+    from macro_alignment import get_aligned_macro, lagged_correlations, RESAMPLE_RULES
+
+    st.subheader(f"{stock_symbol} and Economic Indicators")
+    macro_col1, macro_col2 = st.columns(2)
+    macro_period = macro_col1.selectbox("History", ["1y", "2y", "5y", "10y"], index=1, key="macro_period")
+    resolution = macro_col2.selectbox("Resolution", list(RESAMPLE_RULES), index=1, key="macro_resolution")
+    relevant = get_relevant_economic_indicators(stock_symbol)
+    indicators = st.multiselect("Indicators", relevant, default=relevant, key="macro_indicators")
+    if not indicators:
+        st.info("Select at least one indicator.")
+        return
+
+    aligned = get_aligned_macro(stock_symbol, indicators, period=macro_period, rule=RESAMPLE_RULES[resolution])
+    missing = [indicator for indicator in indicators if indicator not in aligned.columns]
+    if missing:
+        st.warning(f"Could not fetch: {', '.join(missing)}")
+    available = [indicator for indicator in indicators if indicator in aligned.columns]
+    if not available:
+        return
+
+    st.caption("Each value is shown from its estimated release date, so no bar sees data published after it.")
+    levels = aligned[['Close'] + available]
+    rebased = levels / levels.bfill().iloc[0] * 100
+    st.line_chart(rebased.rename(columns={'Close': stock_symbol}))
+
+    st.subheader("Lagged correlation with returns")
+    st.caption(f"Correlation between each indicator's change in a {resolution.lower()} bar and {stock_symbol}'s return that many bars later.")
+    correlations = lagged_correlations(aligned[['Close', 'Return'] + available])
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Heatmap(
+        z=correlations.to_numpy().T,
+        x=correlations.index,
+        y=correlations.columns,
+        colorscale="RdBu",
+        reversescale=True,
+        zmid=0,
+        zmin=-1,
+        zmax=1,
+    ))
+    fig.update_layout(height=120 + 40 * len(available), xaxis_title="Lag (bars)")
+    st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Aligned data"):
+        st.dataframe(aligned, use_container_width=True)
+
+@st.fragment(run_every=NEWS_POLL_INTERVAL)
+def render_pending_news(stock_symbol):
+    """
+    Poll the background news tasks, then rerun the page once everything has loaded.
+    """
+    render_news(stock_symbol)
+    _, sentiment = get_news_tasks(stock_symbol)
+    if sentiment is not None and sentiment.done():
+        st.rerun()
+
 tab1, tab2, tab3 = st.tabs(["Stock Analysis", "Economic Indicators", "Watchlist"])
 
 with tab1:
@@ -30,6 +334,8 @@ with tab1:
         try:
             logging.info(f"Fetching data for stock_symbol: {stock_symbol}")
             stock_info = get_stock_info(stock_symbol)
+            # Start the news scrape only once the symbol is known to be valid
+            get_news_tasks(stock_symbol)
             
             logging.info(f"Data fetched for stock_symbol: {stock_symbol}")
 
@@ -43,65 +349,20 @@ with tab1:
                 col3.metric("EPS", f"${stock_info['trailingEps']:.2f}" if isinstance(stock_info['trailingEps'], (int, float)) else "N/A")
                 col4.metric("Dividend Yield", f"{stock_info['dividendYield']*100:.2f}%" if isinstance(stock_info['dividendYield'], (int, float)) else "N/A")
 
-                st.subheader("Stock Price Chart")
-                time_period = st.selectbox("Select time period", ["1m", "5m", "15m", "30m", "1hr", "24hr", "3month", "1year"])
-                try:
-                    chart_data = get_advanced_stock_data(stock_symbol, period=time_period)
-                    
-                    show_support = st.checkbox("Show Support Line", value=True)
-                    show_resistance = st.checkbox("Show Resistance Line", value=True)
-                    
-                    if chart_data is not None and not chart_data.empty:
-                        fig = go.Figure()
-                        fig.add_trace(go.Candlestick(
-                            x=chart_data.index,
-                            open=chart_data['Open'],
-                            high=chart_data['High'],
-                            low=chart_data['Low'],
-                            close=chart_data['Close'],
-                            name="Price"
-                        ))
-
-                        if show_support:
-                            fig.add_hline(y=chart_data['Support'].iloc[0], line_dash="dash", line_color="green", annotation_text="Support")
-                        if show_resistance:
-                            fig.add_hline(y=chart_data['Resistance'].iloc[0], line_dash="dash", line_color="red", annotation_text="Resistance")
-
-                        fig.update_layout(height=600, title=f"{stock_symbol} Stock Price")
-                        st.plotly_chart(fig, use_container_width=True)
-
-                        csv = convert_to_csv(chart_data)
-                        st.download_button(
-                            label="Download CSV",
-                            data=csv,
-                            file_name=f"{stock_symbol}_stock_data.csv",
-                            mime="text/csv"
-                        )
-                    else:
-                        st.warning(f"No data available for {stock_symbol} with the selected time period.")
-                except InvalidStockSymbolError as ise:
-                    st.error(f"Error: {str(ise)}")
-                    logging.error(f"Error fetching chart data: {str(ise)}")
-                except Exception as e:
-                    st.error(f"An unexpected error occurred while fetching chart data: {str(e)}")
-                    logging.error(f"Unexpected error fetching chart data: {str(e)}")
-                    logging.error(traceback.format_exc())
+                render_chart(stock_symbol)
 
                 if st.button("Add to Watchlist"):
-                    save_stock_to_db(stock_symbol)
-                    st.success(f"Added {stock_symbol} to your watchlist!")
+                    if save_stock_to_db(stock_symbol):
+                        st.success(f"Added {stock_symbol} to your watchlist!")
+                    else:
+                        st.error(f"Could not add {stock_symbol} to your watchlist.")
 
                 st.subheader("Recent News Articles with Sentiment Analysis")
-                news_articles = get_news_articles(stock_symbol)
-                news_articles_with_sentiment = analyze_news_sentiment(news_articles)
-                for article in news_articles_with_sentiment[:5]:
-                    st.markdown(f"[{article['title']}]({article['url']})")
-                    st.write(article['description'])
-                    if 'sentiment' in article:
-                        sentiment = article['sentiment']
-                        st.write(f"Sentiment: Positive: {sentiment['pos']:.2f}, Negative: {sentiment['neg']:.2f}, Neutral: {sentiment['neu']:.2f}")
-                        st.progress(sentiment['compound'] + 1, text="Sentiment Score")
-                    st.write("---")
+                _, sentiment = get_news_tasks(stock_symbol)
+                if sentiment is not None and sentiment.done():
+                    render_news(stock_symbol)
+                else:
+                    render_pending_news(stock_symbol)
 
         except InvalidStockSymbolError as ise:
             st.error(f"Error: {str(ise)} Examples of valid symbols: AAPL (Apple), GOOGL (Alphabet), MSFT (Microsoft).")
@@ -115,4 +376,112 @@ with tab1:
             logging.error(f"Unexpected error: {str(e)}")
             logging.error(f"Traceback: {traceback.format_exc()}")
 
-# Rest of the code remains the same...
+with tab2:
+    if not stock_symbol:
+        st.info("Enter a stock symbol on the Stock Analysis tab to compare it with economic indicators.")
+    else:
+        try:
+            render_macro(stock_symbol)
+        except InvalidStockSymbolError as ise:
+            st.error(f"Error: {str(ise)}")
+        except Exception as e:
+            st.error(f"An unexpected error occurred while aligning economic indicators: {str(e)}")
+            logging.error(f"Unexpected error aligning economic indicators: {str(e)}")
+            logging.error(traceback.format_exc())
+
+with tab3:
+    st.subheader("Your Watchlist")
+
+    new_symbols = st.text_input("Add stocks (comma-separated):", key="watchlist_add")
+    if st.button("Add Stocks"):
+        symbols = [symbol.strip().upper() for symbol in new_symbols.split(",") if symbol.strip()]
+        if symbols:
+            saved, rejected = save_stocks_to_db(symbols)
+            if saved:
+                st.success(f"Added {', '.join(saved)} to your watchlist!")
+            for symbol, reason in rejected.items():
+                st.error(f"Could not add {symbol}: {reason}")
+
+    watchlist = get_user_stocks()
+
+    if not watchlist:
+        st.info("Your watchlist is empty. Add stocks above or from the Stock Analysis tab.")
+    else:
+        symbols_to_remove = st.multiselect("Remove stocks from your watchlist", watchlist)
+        if st.button("Remove Selected") and symbols_to_remove:
+            remove_stocks_from_db(symbols_to_remove)
+            st.success(f"Removed {', '.join(symbols_to_remove)} from your watchlist!")
+            watchlist = get_user_stocks()
+
+        try:
+            quotes, failures = get_watchlist_quotes(watchlist)
+            if not quotes.empty:
+                st.dataframe(quotes.style.format({
+                    'currentPrice': "${:,.2f}",
+                    'previousClose': "${:,.2f}",
+                    'change': "{:+,.2f}",
+                    'percentChange': "{:+.2f}%",
+                    'periodChange': "{:+.2f}%",
+                    'periodHigh': "${:,.2f}",
+                    'periodLow': "${:,.2f}",
+                    'volume': "{:,.0f}",
+                }), use_container_width=True)
+            if failures:
+                st.warning(f"Could not fetch quotes for: {', '.join(sorted(failures))}")
+
+            render_correlation(watchlist)
+            render_backtest(watchlist)
+
+            st.subheader("Export Watchlist History")
+            export_col1, export_col2 = st.columns(2)
+            export_period = export_col1.selectbox("History period", ["1mo", "6mo", "1y", "5y", "max"], key="watchlist_export_period")
+            export_format = export_col2.selectbox("Export format", available_formats(), key="watchlist_export_format")
+            if st.button("Prepare Export"):
+                history, export_failures = get_watchlist_history(watchlist, period=export_period)
+                frames = {symbol: history[symbol].dropna(how='all') for symbol in history.columns.get_level_values(0).unique()}
+                if frames:
+                    st.download_button(
+                        label=f"Download {export_format} archive",
+                        data=export_archive(frames, export_format),
+                        file_name=f"watchlist_{export_period}.zip",
+                        mime="application/zip"
+                    )
+                if export_failures:
+                    st.warning(f"Could not export: {', '.join(sorted(export_failures))}")
+        except Exception as e:
+            st.error(f"An unexpected error occurred while fetching watchlist quotes: {str(e)}")
+            logging.error(f"Unexpected error fetching watchlist quotes: {str(e)}")
+            logging.error(traceback.format_exc())
+
+if show_timings:
+    with st.sidebar:
+        st.subheader("Last rerun")
+        trace_columns = ['stage', 'start_s', 'duration_s', 'thread']
+        trace_format = {'start_s': "{:.3f}", 'duration_s': "{:.3f}"}
+        trace = metrics.get_trace()
+        if trace:
+            st.dataframe(pd.DataFrame(trace, columns=trace_columns).style.format(trace_format), use_container_width=True)
+            rerun_thread = st.session_state['trace'].thread
+            st.write(f"Total in spans on the rerun thread: "
+                     f"{sum(duration for _, _, duration, thread in trace if thread == rerun_thread):.3f} s")
+        else:
+            st.write("No instrumented stages ran.")
+
+        if previous_trace is not None:
+            worker_spans = [entry for entry in metrics.get_trace(previous_trace) if entry[3] != previous_trace.thread]
+            if worker_spans:
+                st.subheader("Worker threads of the previous rerun")
+                st.caption("Includes background work that finished after that rerun was drawn.")
+                st.dataframe(pd.DataFrame(worker_spans, columns=trace_columns).style.format(trace_format),
+                             use_container_width=True)
+
+        st.subheader("Counters")
+        counters = [
+            {'counter': name, 'labels': ', '.join(f"{key}={value}" for key, value in labels), 'value': value}
+            for (name, labels), value in sorted(metrics.get_counters().items())
+        ]
+        if counters:
+            st.dataframe(pd.DataFrame(counters), use_container_width=True)
+
+        cache = price_cache.get_cache_stats()
+        st.write(f"Price cache: {cache['frames']} frames, {cache['bytes'] / 2**20:.1f} of {cache['max_bytes'] / 2**20:.0f} MB")
@@ -0,0 +1,191 @@
+"""
+Lightweight in-process instrumentation.
+
+- `span(stage)` times a block and records it in a per-stage histogram and in
+  the current trace. The trace lives in a context variable; work handed to other
+  threads records into the caller's trace when wrapped with `in_current_trace`
+- `inc(name, **labels)` increments a labelled counter; `upstream_call(service)`
+  and `cache_result(cache, hit)` cover the common upstream and cache counters
+- `render_prometheus()` renders everything in the Prometheus text format, and
+  `start_metrics_server(port)` serves it on /metrics
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+COUNTER_HELP = {
+    'upstream_requests_total': "Requests made to upstream services",
+    'upstream_errors_total': "Failed requests to upstream services",
+    'cache_requests_total': "Cache lookups by cache and result",
+}
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_trace = contextvars.ContextVar('metrics_trace', default=None)
+_server = None
+
+class Trace:
+    """
+    Spans recorded for one unit of work, such as a rerun, on any thread it hands work to.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.thread = threading.current_thread().name
+        self.spans = []
+
+    def entries(self):
+        """
+        :return: List of (stage, offset in seconds from the trace start, duration in seconds, thread name)
+        """
+        return [(stage, start - self.start, elapsed, thread) for stage, start, elapsed, thread in list(self.spans)]
+
+@contextmanager
+def span(stage):
+    """
+    Time the enclosed block as `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            stats = _spans.get(stage)
+            if stats is None:
+                stats = _spans[stage] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(SPAN_BUCKETS)}
+            stats['count'] += 1
+            stats['sum'] += elapsed
+            position = bisect.bisect_left(SPAN_BUCKETS, elapsed)
+            if position < len(SPAN_BUCKETS):
+                stats['buckets'][position] += 1
+        trace = _trace.get()
+        if trace is not None:
+            trace.spans.append((stage, start, elapsed, threading.current_thread().name))
+
+def inc(name, amount=1, **labels):
+    """
+    Increment the counter `name` with the given labels.
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def cache_result(cache, hit):
+    inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+@contextmanager
+def upstream_call(service):
+    """
+    Count a request to an upstream service, and count it as an error if the block raises.
+    """
+    inc('upstream_requests_total', service=service)
+    try:
+        yield
+    except Exception:
+        inc('upstream_errors_total', service=service)
+        raise
+
+def start_trace():
+    """
+    Start a new trace in the current context, e.g. at the top of a rerun.
+
+    :return: The new Trace
+    """
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+def get_trace(trace=None):
+    """
+    Return the spans recorded in `trace` (default: the current one) so far.
+
+    :return: List of (stage, offset in seconds from the trace start, duration in seconds, thread name)
+    """
+    trace = trace if trace is not None else _trace.get()
+    return trace.entries() if trace is not None else []
+
+def in_current_trace(function):
+    """
+    Wrap `function` so that, on whichever thread it runs, its spans go to the caller's current trace.
+    """
+    trace = _trace.get()
+
+    def run(*args, **kwargs):
+        token = _trace.set(trace)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+    return run
+
+def get_counters():
+    with _lock:
+        return {(name, labels): value for (name, labels), value in _counters.items()}
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+def render_prometheus():
+    """
+    Render all spans and counters in the Prometheus text exposition format.
+    """
+    with _lock:
+        spans = {stage: {'count': s['count'], 'sum': s['sum'], 'buckets': list(s['buckets'])} for stage, s in _spans.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP stage_duration_seconds Time spent in each pipeline stage",
+        "# TYPE stage_duration_seconds histogram",
+    ]
+    for stage, stats in sorted(spans.items()):
+        cumulative = 0
+        for bound, count in zip(SPAN_BUCKETS, stats['buckets']):
+            cumulative += count
+            lines.append(f'stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'stage_duration_seconds_sum{{stage="{stage}"}} {stats["sum"]}')
+        lines.append(f'stage_duration_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# HELP {name} {COUNTER_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        payload = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port):
+    """
+    Serve /metrics on `port` from a background thread. Later calls are no-ops.
+    """
+    global _server
+    with _lock:
+        if _server is not None:
+            return
+        _server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
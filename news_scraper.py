@@ -1,31 +1,169 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+import metrics
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+NEWS_URL_TEMPLATE = "https://finance.yahoo.com/quote/{symbol}/news"
+ARTICLE_BASE_URL = "https://finance.yahoo.com"
+ARTICLE_CLASS = 'Ov(h) Pend(44px) Pstart(25px)'
+
+# (connect, read) timeout in seconds for news page requests
+NEWS_TIMEOUT = (3.05, 10)
+# A symbol's articles are served without contacting Yahoo for this many seconds,
+# after which the page is revalidated with ETag / If-Modified-Since
+NEWS_CACHE_TTL = 5 * 60
+# Symbols whose articles are kept; the least recently used are evicted
+NEWS_CACHE_SIZE = 256
+NEWS_POOL_SIZE = 8
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+_session = None
+_session_lock = threading.Lock()
+# symbol -> {'urls', 'etag', 'last_modified', 'checked_at'}
+_news_cache = OrderedDict()
+# url -> article, shared by every symbol whose page lists it
+_articles = {}
+_cache_lock = threading.Lock()
+# symbol -> [lock, number of callers holding or waiting for it]; dropped when idle
+_symbol_locks = {}
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=NEWS_POOL_SIZE, pool_maxsize=NEWS_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+@contextmanager
+def _symbol_lock(symbol):
+    """
+    Serialize scrapes of one symbol. The lock only exists while someone uses it.
+    """
+    with _cache_lock:
+        entry = _symbol_locks.setdefault(symbol, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _cache_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _symbol_locks[symbol]
+
+def parse_news_page(html):
+    """
+    Extract articles from a Yahoo news page.
+
+    Only the article containers are built into a tree; the rest of the page is skipped.
+
+    :return: List of dictionaries with title, url and description
+    """
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer('div', class_=ARTICLE_CLASS))
+    articles = []
+    for item in soup.find_all('div', class_=ARTICLE_CLASS):
+        heading = item.find('h3')
+        anchor = item.find('a', href=True)
+        summary = item.find('p')
+        if heading is None or anchor is None:
+            continue
+        title = heading.get_text()
+        if title:
+            articles.append({
+                'title': title,
+                'url': f"{ARTICLE_BASE_URL}{anchor['href']}",
+                'description': summary.get_text() if summary is not None else ''
+            })
+    return articles
+
+def _cached_articles(entry):
+    return [dict(_articles[url]) for url in entry['urls'] if url in _articles]
+
+def _store(symbol, entry, articles):
+    """
+    Cache `articles` for `symbol` and return copies of them, deduplicated by URL.
+    """
+    with _cache_lock:
+        for article in articles:
+            _articles[article['url']] = article
+        entry['urls'] = list(dict.fromkeys(article['url'] for article in articles))
+        _news_cache[symbol] = entry
+        _news_cache.move_to_end(symbol)
+        if len(_news_cache) > NEWS_CACHE_SIZE:
+            _news_cache.popitem(last=False)
+            referenced = {url for cached in _news_cache.values() for url in cached['urls']}
+            for url in [url for url in _articles if url not in referenced]:
+                del _articles[url]
+        return _cached_articles(entry)
+
+def clear_news_cache():
+    with _cache_lock:
+        _news_cache.clear()
+        _articles.clear()
 
 def get_news_articles(symbol):
     """
     Scrape news articles related to the given stock symbol.
+
+    Pages are cached per symbol for NEWS_CACHE_TTL seconds and then revalidated
+    with a conditional request. Articles listed for several symbols are stored
+    once; each caller gets its own copies.
     """
-    url = f"https://finance.yahoo.com/quote/{symbol}/news"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    
-    try:
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        articles = []
-
-        for item in soup.find_all('div', class_='Ov(h) Pend(44px) Pstart(25px)'):
-            title = item.find('h3').text if item.find('h3') else ''
-            link = item.find('a')['href'] if item.find('a') else ''
-            description = item.find('p').text if item.find('p') else ''
-
-            if title and link:
-                articles.append({
-                    'title': title,
-                    'url': f"https://finance.yahoo.com{link}",
-                    'description': description
-                })
-
-        return articles
-    except Exception as e:
-        print(f"Error scraping news: {e}")
-        return []
+    url = NEWS_URL_TEMPLATE.format(symbol=symbol)
+
+    with metrics.span('news_scrape'), _symbol_lock(symbol):
+        with _cache_lock:
+            entry = _news_cache.get(symbol)
+            if entry is not None:
+                _news_cache.move_to_end(symbol)
+                if time.time() - entry['checked_at'] < NEWS_CACHE_TTL:
+                    metrics.cache_result('news', hit=True)
+                    return _cached_articles(entry)
+
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            with metrics.upstream_call('yahoo_news'):
+                response = _get_session().get(url, headers=headers, timeout=NEWS_TIMEOUT)
+                if response.status_code != 304:
+                    response.raise_for_status()
+        except Exception as e:
+            logging.error(f"Error scraping news: {e}")
+            if entry is None:
+                return []
+            # Serve the stale copy rather than nothing
+            with _cache_lock:
+                return _cached_articles(entry)
+
+        metrics.cache_result('news', hit=response.status_code == 304)
+        if response.status_code == 304:
+            with _cache_lock:
+                articles = [_articles[url] for url in entry['urls'] if url in _articles]
+                entry['checked_at'] = time.time()
+            return _store(symbol, entry, articles)
+
+        return _store(symbol, {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        }, parse_news_page(response.content))
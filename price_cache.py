@@ -0,0 +1,133 @@
+"""
+Shared in-process cache of price frames under a global memory budget.
+
+Frames are stored compactly. Open/High/Low/Close, followed by any other float
+columns such as Dividends, go in one C-contiguous float32 block of shape
+(columns, bars), which is exactly the layout pandas uses for a block of float32
+columns. Volumes are int64 and timestamps are int64 nanoseconds (UTC). Every
+array is read-only, and `get` wraps them in a DataFrame without copying (float
+columns first, then Volume), so all sessions share one copy of each frame and
+none can modify it.
+
+The least recently used frames are evicted once the cached arrays exceed
+PRICE_CACHE_MAX_BYTES (environment variable, default 256 MB).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import metrics
+
+PRICE_CACHE_MAX_BYTES = int(os.environ.get('PRICE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_bytes = 0
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+class CompactFrame:
+    """
+    Read-only columnar copy of an OHLCV frame.
+    """
+    def __init__(self, data):
+        index = data.index
+        self.tz = str(index.tz) if getattr(index, 'tz', None) is not None else None
+        if self.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        self.index_name = index.name
+        self.timestamps = _read_only(np.ascontiguousarray(index.to_numpy(dtype='datetime64[ns]').view('int64')))
+        # OHLC first, then any other columns (e.g. Dividends, Stock Splits), in one block
+        self.columns = PRICE_COLUMNS + [column for column in data.columns if column not in PRICE_COLUMNS and column != 'Volume']
+        self.values = _read_only(np.ascontiguousarray(data[self.columns].to_numpy(dtype='float32').T))
+        self.volume = _read_only(np.ascontiguousarray(data['Volume'].fillna(0).to_numpy(dtype='int64'))) if 'Volume' in data else None
+
+    @property
+    def prices(self):
+        """
+        The (4, bars) Open/High/Low/Close block.
+        """
+        return self.values[:len(PRICE_COLUMNS)]
+
+    @property
+    def nbytes(self):
+        arrays = (self.timestamps, self.values, self.volume)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def to_frame(self):
+        """
+        Wrap the stored arrays in a DataFrame. Column data is shared, not copied.
+        """
+        # Integer nanoseconds with a tz-aware dtype are read as UTC instants, also without a copy
+        dtype = pd.DatetimeTZDtype(tz=self.tz) if self.tz is not None else 'datetime64[ns]'
+        index = pd.DatetimeIndex(self.timestamps, dtype=dtype, name=self.index_name, copy=False)
+
+        frame = pd.DataFrame(self.values.T, index=index, columns=self.columns, copy=False)
+        if self.volume is None:
+            return frame
+        # Two blocks of different dtypes are concatenated without consolidating (copying) them
+        return pd.concat([frame, pd.DataFrame({'Volume': self.volume}, index=index, copy=False)], axis=1, copy=False)
+
+def get(key):
+    """
+    Return the cached frame for `key` as a read-only DataFrame, or None.
+    """
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            _remove(key)
+            entry = None
+        if entry is not None:
+            _cache.move_to_end(key)
+    metrics.cache_result('price_cache', hit=entry is not None)
+    return entry[0].to_frame() if entry is not None else None
+
+def _remove(key):
+    global _cache_bytes
+    compact, _ = _cache.pop(key)
+    _cache_bytes -= compact.nbytes
+
+def put(key, data, ttl):
+    """
+    Store a compact copy of an OHLCV frame for `ttl` seconds and return it as a read-only DataFrame.
+
+    Frames that aren't numeric OHLC(V) bars, or are larger than the whole budget, and
+    non-positive TTLs are returned unchanged and not cached.
+    """
+    global _cache_bytes
+    if ttl <= 0 or data.empty or not set(PRICE_COLUMNS).issubset(data.columns) or not isinstance(data.index, pd.DatetimeIndex):
+        return data
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes):
+        return data
+    compact = CompactFrame(data)
+    if compact.nbytes > PRICE_CACHE_MAX_BYTES:
+        return data
+
+    with _cache_lock:
+        if key in _cache:
+            _remove(key)
+        _cache[key] = (compact, time.monotonic() + ttl)
+        _cache_bytes += compact.nbytes
+        while _cache_bytes > PRICE_CACHE_MAX_BYTES:
+            _remove(next(iter(_cache)))
+            metrics.inc('price_cache_evictions_total')
+    return compact.to_frame()
+
+def clear():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+def get_cache_stats():
+    """
+    :return: Dictionary with the number of cached frames, their size in bytes and the budget
+    """
+    with _cache_lock:
+        return {'frames': len(_cache), 'bytes': _cache_bytes, 'max_bytes': PRICE_CACHE_MAX_BYTES}
@@ -0,0 +1,233 @@
+"""
+Headless universe scanner.
+
+Runs the stock_data pipeline (history fetch, indicators, support/resistance
+levels and company info) for every symbol in a universe file on a process pool
+and writes one results table:
+
+    python scanner.py universe.txt --period 1year --output scan.parquet
+
+Progress is appended to a checkpoint file after every symbol, so an
+interrupted scan resumes where it stopped when run again with the same
+checkpoint and period. Rows scanned for another period are ignored.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+from export import available_formats, export_to_path
+from indicators import compute_indicators
+from stock_data import get_advanced_stock_data, get_stock_info
+from support_resistance import detect_levels, nearest_levels
+from utils import get_cache_dir
+
+# Output file extension -> export format
+OUTPUT_FORMATS = {'.csv': 'CSV', '.parquet': 'Parquet', '.arrow': 'Arrow IPC'}
+
+RESULT_COLUMNS = [
+    'symbol', 'status', 'error', 'bars', 'last_close', 'period_return',
+    'sma50', 'sma200', 'bb_upper', 'bb_lower', 'macd', 'macd_signal', 'rsi',
+    'last_crossover', 'last_crossover_at', 'support', 'resistance',
+    'sector', 'industry', 'market_cap', 'trailing_pe',
+]
+
+logger = logging.getLogger('scanner')
+
+class RateLimiter:
+    """
+    Token bucket limiting how many symbols per second are handed to workers.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+def _to_float(value):
+    return float(value) if isinstance(value, (int, float)) and pd.notna(value) else None
+
+def scan_symbol(symbol, period):
+    """
+    Run the analysis pipeline for one symbol.
+
+    :return: Dictionary with one value per RESULT_COLUMNS entry
+    """
+    row = dict.fromkeys(RESULT_COLUMNS)
+    row['symbol'] = symbol
+    try:
+        data = get_advanced_stock_data(symbol, period=period)
+        info = get_stock_info(symbol)
+
+        indicators, _ = compute_indicators(data['Close'], data['High'], data['Low'])
+        latest = indicators.iloc[-1]
+        crossovers = indicators['SMA_Cross'][indicators['SMA_Cross'] != 0]
+        support, resistance = nearest_levels(detect_levels(data), data['Close'].iloc[-1])
+
+        row.update({
+            'status': 'ok',
+            'bars': len(data),
+            'last_close': float(data['Close'].iloc[-1]),
+            'period_return': float(data['Close'].iloc[-1] / data['Close'].iloc[0] - 1),
+            'sma50': _to_float(latest['SMA50']),
+            'sma200': _to_float(latest['SMA200']),
+            'bb_upper': _to_float(latest['BB_Upper']),
+            'bb_lower': _to_float(latest['BB_Lower']),
+            'macd': _to_float(latest['MACD']),
+            'macd_signal': _to_float(latest['MACD_Signal']),
+            'rsi': _to_float(latest['RSI']),
+            'last_crossover': int(crossovers.iloc[-1]) if not crossovers.empty else None,
+            'last_crossover_at': crossovers.index[-1].isoformat() if not crossovers.empty else None,
+            'support': _to_float(support),
+            'resistance': _to_float(resistance),
+            'sector': info['sector'],
+            'industry': info['industry'],
+            'market_cap': _to_float(info['marketCap']),
+            'trailing_pe': _to_float(info['trailingPE']),
+        })
+    except Exception as e:
+        row['status'] = 'error'
+        row['error'] = str(e)
+    return row
+
+def read_universe(path):
+    """
+    Read symbols from a text or CSV file: the first field of each non-empty, non-comment line.
+    """
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            symbol = line.split(',')[0].strip().upper()
+            if symbol and symbol != 'SYMBOL':
+                symbols.append(symbol)
+    return list(dict.fromkeys(symbols))
+
+def read_checkpoint(path, period=None):
+    """
+    Read result rows from a checkpoint file, keeping the last row per symbol.
+
+    :param period: If given, rows scanned for a different period are skipped
+    """
+    rows = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interrupted run
+                    continue
+                if period is not None and row.get('period') != period:
+                    continue
+                rows[row['symbol']] = row
+    return rows
+
+def run_scan(symbols, period, checkpoint_path, workers=None, rate=5.0, retry_errors=False):
+    """
+    Scan `symbols` on a process pool, appending every result to the checkpoint file.
+
+    At most two symbols per worker are in flight at any time, and symbols are
+    handed out no faster than `rate` per second.
+
+    :return: DataFrame of results indexed by symbol
+    """
+    done = read_checkpoint(checkpoint_path, period)
+    pending = [
+        symbol for symbol in symbols
+        if symbol not in done or (retry_errors and done[symbol]['status'] != 'ok')
+    ]
+    logger.info(f"Scanning {len(pending)} symbols ({len(symbols) - len(pending)} already in checkpoint)")
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    limiter = RateLimiter(rate, burst=workers)
+    completed = 0
+    started = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(checkpoint_path, 'a') as checkpoint:
+        in_flight = set()
+        queue = iter(pending)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_in_flight:
+                symbol = next(queue, None)
+                if symbol is None:
+                    exhausted = True
+                    break
+                limiter.acquire()
+                in_flight.add(executor.submit(scan_symbol, symbol, period))
+
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                row = future.result()
+                row['period'] = period
+                done[row['symbol']] = row
+                checkpoint.write(json.dumps(row) + '\n')
+                completed += 1
+            checkpoint.flush()
+            if completed % 100 < len(finished):
+                elapsed = time.monotonic() - started
+                logger.info(f"Scanned {completed}/{len(pending)} symbols ({completed / elapsed:.1f}/s)")
+
+    results = pd.DataFrame([done[symbol] for symbol in symbols if symbol in done], columns=RESULT_COLUMNS)
+    return results.set_index('symbol')
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the stock analysis pipeline over a symbol universe.")
+    parser.add_argument('universe', help="file with one symbol per line (or CSV with symbols in the first column)")
+    parser.add_argument('--period', default='1year', help="chart period as accepted by get_advanced_stock_data (default: 1year)")
+    parser.add_argument('--output', default='scan_results.csv', help="results file; .csv, .parquet or .arrow")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument('--rate', type=float, default=5.0, help="maximum symbols started per second (0 = unlimited)")
+    parser.add_argument('--checkpoint', default=None, help="checkpoint file (default: derived from the output name)")
+    parser.add_argument('--retry-errors', action='store_true', help="rescan symbols that failed in a previous run")
+    parser.add_argument('--fresh', action='store_true', help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    # Keep per-symbol pipeline logging quiet; report scanner progress only
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger.setLevel(logging.INFO)
+
+    extension = os.path.splitext(args.output)[1].lower()
+    fmt = OUTPUT_FORMATS.get(extension)
+    if fmt is None or fmt not in available_formats():
+        parser.error(f"Unsupported output format {extension!r}; use one of {[e for e, f in OUTPUT_FORMATS.items() if f in available_formats()]}")
+
+    checkpoint_path = args.checkpoint or os.path.join(
+        get_cache_dir('scanner'), f"{os.path.basename(args.output)}.{args.period}.checkpoint.jsonl"
+    )
+    if args.fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    symbols = read_universe(args.universe)
+    results = run_scan(symbols, args.period, checkpoint_path, args.workers, args.rate, args.retry_errors)
+    export_to_path(results, args.output, fmt)
+
+    failed = int((results['status'] != 'ok').sum())
+    print(f"Wrote {len(results)} results to {args.output} ({failed} failed)")
+
+if __name__ == '__main__':
+    main()
@@ -1,45 +1,206 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from utils import get_cache_dir
+import metrics
 
-# Download necessary NLTK data
-nltk.download('vader_lexicon', quiet=True)
+# NLTK data is looked up here first, then in NLTK's default locations; populate
+# it ahead of time with `python bootstrap.py --download-data`
+NLTK_DATA_DIR = os.environ.get('NLTK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data'))
+VADER_LEXICON_RESOURCE = 'sentiment/vader_lexicon.zip'
+
+# Number of articles fetched concurrently
+SENTIMENT_MAX_WORKERS = 8
+# (connect, read) timeout in seconds for article requests
+ARTICLE_TIMEOUT = (3.05, 10)
+# Cached scores are served without refetching the article for this many seconds
+SENTIMENT_CACHE_TTL = 24 * 60 * 60
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+_session = None
+_analyzer = None
+_cache_conn = None
+_lexicon_found = False
+_lock = threading.Lock()
+_cache_lock = threading.Lock()
+
+def _get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=SENTIMENT_MAX_WORKERS, pool_maxsize=SENTIMENT_MAX_WORKERS)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+def _nltk():
+    import nltk
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return nltk
+
+def _nltk_data_paths():
+    """
+    Directories NLTK searches for data, in its own order after NLTK_DATA_DIR.
+    """
+    paths = [NLTK_DATA_DIR]
+    paths.extend(path for path in os.environ.get('NLTK_DATA', '').split(os.pathsep) if path)
+    paths.append(os.path.expanduser('~/nltk_data'))
+    paths.extend(os.path.join(sys.prefix, path) for path in ('nltk_data', 'share/nltk_data', 'lib/nltk_data'))
+    paths.extend(['/usr/share/nltk_data', '/usr/local/share/nltk_data', '/usr/lib/nltk_data', '/usr/local/lib/nltk_data'])
+    return paths
+
+def vader_lexicon_available():
+    """
+    Check whether the VADER lexicon is on disk, in NLTK_DATA_DIR or any of NLTK's default locations.
+
+    Only the filesystem is consulted, so the check does not import nltk. A
+    positive result is remembered for the life of the process.
+    """
+    global _lexicon_found
+    if not _lexicon_found:
+        unzipped = VADER_LEXICON_RESOURCE[:-len('.zip')]
+        for path in _nltk_data_paths():
+            archive = os.path.join(path, VADER_LEXICON_RESOURCE)
+            if os.path.isdir(os.path.join(path, unzipped)) or zipfile.is_zipfile(archive):
+                _lexicon_found = True
+                break
+            if os.path.exists(archive):
+                logging.error(f"Unreadable VADER lexicon: {archive}")
+    return _lexicon_found
+
+def download_vader_lexicon():
+    """
+    Download the VADER lexicon into NLTK_DATA_DIR. Meant for build time, not page loads.
+    """
+    nltk = _nltk()
+    os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+    return nltk.download('vader_lexicon', download_dir=NLTK_DATA_DIR, quiet=True)
+
+def _get_analyzer():
+    global _analyzer
+    with _lock:
+        if _analyzer is None:
+            _nltk()
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            _analyzer = SentimentIntensityAnalyzer()
+        return _analyzer
+
+def _get_cache():
+    global _cache_conn
+    if _cache_conn is None:
+        conn = sqlite3.connect(os.path.join(get_cache_dir(), 'sentiment.sqlite3'), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_sentiment (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                scores TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS article_sentiment_hash ON article_sentiment (content_hash)")
+        conn.commit()
+        _cache_conn = conn
+    return _cache_conn
+
+def _cache_lookup_url(url):
+    with _cache_lock:
+        return _get_cache().execute(
+            "SELECT content_hash, scores, checked_at FROM article_sentiment WHERE url = ?", (url,)
+        ).fetchone()
+
+def _cache_lookup_hash(content_hash):
+    with _cache_lock:
+        row = _get_cache().execute(
+            "SELECT scores FROM article_sentiment WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+def _cache_store(url, content_hash, scores):
+    with _cache_lock:
+        conn = _get_cache()
+        conn.execute(
+            "INSERT OR REPLACE INTO article_sentiment (url, content_hash, scores, checked_at) VALUES (?, ?, ?, ?)",
+            (url, content_hash, json.dumps(scores), time.time())
+        )
+        conn.commit()
+
+def _fetch_article_text(url):
+    with metrics.upstream_call('article'):
+        response = _get_session().get(url, timeout=ARTICLE_TIMEOUT)
+        response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'html.parser')
+    # Extract article text (this is a simplified approach)
+    return ' '.join([p.text for p in soup.find_all('p')])
 
 def get_article_sentiment(url):
     """
     Perform sentiment analysis on a news article.
-    
+
+    Scores are cached on disk by URL and by a hash of the article text, so an
+    article is only scored once across sessions and reruns.
+
     :param url: URL of the news article
     :return: Sentiment scores (compound, positive, negative, neutral)
     """
     try:
-        # Fetch article content
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract article text (this is a simplified approach)
-        article_text = ' '.join([p.text for p in soup.find_all('p')])
-        
-        # Perform sentiment analysis
-        sia = SentimentIntensityAnalyzer()
-        sentiment_scores = sia.polarity_scores(article_text)
-        
+        cached = _cache_lookup_url(url)
+        if cached is not None and time.time() - cached[2] < SENTIMENT_CACHE_TTL:
+            metrics.cache_result('sentiment', hit=True)
+            return json.loads(cached[1])
+
+        article_text = _fetch_article_text(url)
+        content_hash = hashlib.sha256(article_text.encode('utf-8')).hexdigest()
+
+        if cached is not None and cached[0] == content_hash:
+            sentiment_scores = json.loads(cached[1])
+        else:
+            sentiment_scores = _cache_lookup_hash(content_hash)
+        metrics.cache_result('sentiment', hit=sentiment_scores is not None)
+        if sentiment_scores is None:
+            sentiment_scores = _get_analyzer().polarity_scores(article_text)
+
+        _cache_store(url, content_hash, sentiment_scores)
         return sentiment_scores
     except Exception as e:
-        print(f"Error analyzing sentiment for {url}: {str(e)}")
+        logging.error(f"Error analyzing sentiment for {url}: {str(e)}")
         return None
 
-def analyze_news_sentiment(news_articles):
+def analyze_news_sentiment(news_articles, limit=None):
     """
     Analyze sentiment for a list of news articles.
-    
+
+    Without the VADER lexicon the articles are returned unscored; check
+    `vader_lexicon_available()` to tell the user why.
+
     :param news_articles: List of news article dictionaries
+    :param limit: Only score the first `limit` articles (default: all)
     :return: List of news articles with sentiment scores
     """
-    for article in news_articles:
-        sentiment = get_article_sentiment(article['url'])
+    articles = news_articles if limit is None else news_articles[:limit]
+    if not articles or not vader_lexicon_available():
+        return news_articles
+
+    with metrics.span('sentiment_scoring'), \
+            ThreadPoolExecutor(max_workers=min(SENTIMENT_MAX_WORKERS, len(articles))) as executor:
+        sentiments = list(executor.map(metrics.in_current_trace(get_article_sentiment), [article['url'] for article in articles]))
+
+    for article, sentiment in zip(articles, sentiments):
         if sentiment:
             article['sentiment'] = sentiment
-    
+
     return news_articles
@@ -3,24 +3,132 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
+import os
+import threading
+import time
 import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from columnar_store import read_frame, read_meta, write_frame
+import metrics
+import price_cache
+from utils import get_cache_dir
+
+# Symbol metadata is shared by every session in the process. Valid symbols are
+# kept for SYMBOL_INFO_TTL seconds, unknown symbols for SYMBOL_INVALID_TTL.
+SYMBOL_INFO_TTL = 15 * 60
+SYMBOL_INVALID_TTL = 5 * 60
+
+_symbol_info_cache = {}
+_symbol_info_inflight = {}
+_symbol_info_lock = threading.Lock()
+
+# OHLCV bars are kept on disk per (symbol, interval). Only bars after the last
+# stored one are requested upstream; the whole window is re-downloaded every
+# BAR_STORE_RECONCILE_AFTER seconds to pick up corrections.
+BAR_STORE_RECONCILE_AFTER = 6 * 60 * 60
+# Bars older than the longest period requested plus this margin are dropped from
+# the store; the margin also covers weekends and holidays in session-based periods.
+BAR_STORE_MARGIN = timedelta(days=7)
+
+_INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '1d': 86400}
+# How far back Yahoo accepts a start date for each interval
+_INTERVAL_MAX_LOOKBACK = {
+    '1m': timedelta(days=7),
+    '5m': timedelta(days=59),
+    '15m': timedelta(days=59),
+    '30m': timedelta(days=59),
+    '1h': timedelta(days=729),
+}
+
+# Frames from get_stock_data are shared from the in-process price cache for this
+# many seconds; frames from the bar store for as long as the store would serve them.
+HISTORY_CACHE_TTL = 5 * 60
+
+# Watchlist quotes fall back to per-symbol requests on this many threads when
+# the multi-ticker download fails.
+WATCHLIST_MAX_WORKERS = 8
+# Watchlist downloads are shared per (symbols, period, interval) for this many
+# seconds; at most WATCHLIST_CACHE_SIZE of them are kept.
+WATCHLIST_CACHE_TTL = 60
+WATCHLIST_CACHE_SIZE = 32
+
+_watchlist_cache = OrderedDict()
+_watchlist_cache_lock = threading.Lock()
+_watchlist_inflight = {}
+
+_bar_store_locks = {}
+_bar_store_locks_lock = threading.Lock()
 
 class InvalidStockSymbolError(Exception):
     pass
 
+def _fetch_symbol_info(symbol):
+    with metrics.upstream_call('yfinance'):
+        info = yf.Ticker(symbol).info
+    if not info:
+        logging.error(f"Invalid symbol: {symbol} - No info available")
+        return None
+    if 'symbol' not in info:
+        logging.error(f"Invalid symbol: {symbol} - Symbol not found in info")
+        return None
+    return info
+
+def get_symbol_info(symbol):
+    """
+    Return the `Ticker.info` dictionary for a symbol, or None if the symbol is unknown.
+
+    Results are cached process-wide with TTL eviction, and concurrent callers
+    asking for the same symbol share a single upstream request.
+    """
+    key = symbol.upper()
+    now = time.monotonic()
+    with _symbol_info_lock:
+        entry = _symbol_info_cache.get(key)
+        if entry is not None and entry[0] > now:
+            metrics.cache_result('symbol_info', hit=True)
+            return entry[1]
+        metrics.cache_result('symbol_info', hit=False)
+        future = _symbol_info_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _symbol_info_inflight[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        info = _fetch_symbol_info(symbol)
+    except Exception as e:
+        with _symbol_info_lock:
+            del _symbol_info_inflight[key]
+        future.set_exception(e)
+        raise
+
+    ttl = SYMBOL_INFO_TTL if info is not None else SYMBOL_INVALID_TTL
+    with _symbol_info_lock:
+        now = time.monotonic()
+        for expired in [k for k, (expires, _) in _symbol_info_cache.items() if expires <= now]:
+            del _symbol_info_cache[expired]
+        _symbol_info_cache[key] = (now + ttl, info)
+        del _symbol_info_inflight[key]
+    future.set_result(info)
+    return info
+
+def clear_symbol_info_cache():
+    with _symbol_info_lock:
+        _symbol_info_cache.clear()
+
 def is_valid_symbol(symbol):
     logging.info(f"Checking validity of symbol: {symbol}")
     if len(symbol) == 0:
         logging.error(f"Invalid symbol: Empty string")
         return False
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        if not info:
-            logging.error(f"Invalid symbol: {symbol} - No info available")
-            return False
-        if 'symbol' not in info:
-            logging.error(f"Invalid symbol: {symbol} - Symbol not found in info")
+        with metrics.span('symbol_validation'):
+            info = get_symbol_info(symbol)
+        if info is None:
             return False
         logging.info(f"Valid symbol: {symbol}")
         return True
@@ -34,11 +142,17 @@ def get_stock_data(symbol, period="1mo"):
         if not is_valid_symbol(symbol):
             raise InvalidStockSymbolError(f"Invalid stock symbol: {symbol}. Please enter a valid stock symbol.")
         
+        cache_key = ('history', symbol.upper(), period)
+        data = price_cache.get(cache_key)
+        if data is not None:
+            return data
+
         stock = yf.Ticker(symbol)
-        data = stock.history(period=period)
+        with metrics.span('history_fetch'), metrics.upstream_call('yfinance'):
+            data = stock.history(period=period)
         if data.empty:
             raise InvalidStockSymbolError(f"No data available for symbol: {symbol}. Please enter a valid stock symbol.")
-        return data
+        return price_cache.put(cache_key, data, HISTORY_CACHE_TTL)
     except Exception as e:
         logging.error(f"Error for symbol {symbol}: {str(e)}")
         logging.error(traceback.format_exc())
@@ -50,7 +164,7 @@ def get_stock_info(symbol):
             raise InvalidStockSymbolError(f"Invalid stock symbol: {symbol}. Please enter a valid stock symbol.")
         
         stock = yf.Ticker(symbol)
-        info = stock.info
+        info = get_symbol_info(symbol)
         
         if not info:
             raise InvalidStockSymbolError(f"No information available for symbol: {symbol}. Please enter a valid stock symbol.")
@@ -78,6 +192,122 @@ def get_stock_info(symbol):
         logging.error(traceback.format_exc())
         raise InvalidStockSymbolError(f"Error fetching information for symbol: {symbol}. Please try again or enter a different symbol.")
 
+def _period_to_timedelta(period):
+    if period.endswith('mo'):
+        return timedelta(days=31 * int(period[:-2]))
+    if period.endswith('y'):
+        return timedelta(days=366 * int(period[:-1]))
+    if period.endswith('d'):
+        return timedelta(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+def _slice_period(data, period):
+    """
+    Cut a stored bar frame down to the window Yahoo would return for `period`.
+
+    Short day periods count trading sessions, longer ones are calendar windows.
+    """
+    if data.empty:
+        return data
+    if period.endswith('d') and int(period[:-1]) <= 7:
+        sessions = data.index.normalize()
+        first_session = sessions.unique()[-int(period[:-1]):][0]
+        return data[sessions >= first_session]
+    cutoff = pd.Timestamp.now(tz=data.index.tz) - _period_to_timedelta(period)
+    return data[data.index >= cutoff]
+
+def _merge_bars(stored, fresh):
+    if stored is None or stored.empty:
+        return fresh
+    if fresh.empty:
+        return stored
+    # Upstream is authoritative from the first fresh bar onwards
+    return pd.concat([stored[stored.index < fresh.index[0]], fresh])
+
+def _trim_bars(data, span):
+    """
+    Drop stored bars older than `span` seconds plus BAR_STORE_MARGIN.
+    """
+    cutoff = pd.Timestamp.now(tz=data.index.tz) - timedelta(seconds=span) - BAR_STORE_MARGIN
+    return data[data.index >= cutoff]
+
+def _get_bar_store_lock(key):
+    with _bar_store_locks_lock:
+        return _bar_store_locks.setdefault(key, threading.Lock())
+
+def get_stored_bars(stock, symbol, period, interval):
+    """
+    Return OHLCV bars for `period` from the local bar store, fetching only what is missing.
+
+    :param stock: yfinance Ticker for the symbol
+    :param symbol: Stock symbol
+    :param period: yfinance period string, e.g. "60d" or "1y"
+    :param interval: yfinance interval string, e.g. "30m" or "1d"
+    :return: Read-only DataFrame of bars covering `period`
+    """
+    key = (symbol.upper(), interval)
+    cache_key = ('bars', key[0], period, interval)
+    cached = price_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    directory = os.path.join(get_cache_dir('bars', interval), key[0])
+    span = _period_to_timedelta(period).total_seconds()
+    start = pd.Timestamp.now(tz='UTC') - _period_to_timedelta(period) - BAR_STORE_MARGIN
+
+    with metrics.span('history_fetch'), _get_bar_store_lock(key):
+        # Only the requested window is read unless the store is about to be rewritten
+        stored, meta = read_frame(directory, start=start)
+        now = time.time()
+
+        needs_full_fetch = (
+            stored is None
+            or stored.empty
+            or meta.get('span', 0) < span
+            or now - meta.get('reconciled_at', 0) > BAR_STORE_RECONCILE_AFTER
+        )
+        if not needs_full_fetch and interval in _INTERVAL_MAX_LOOKBACK:
+            age = pd.Timestamp.now(tz=stored.index.tz) - stored.index[-1]
+            needs_full_fetch = age >= _INTERVAL_MAX_LOOKBACK[interval]
+
+        fetch_needed = needs_full_fetch or now - meta.get('fetched_at', 0) >= _INTERVAL_SECONDS.get(interval, 60)
+        metrics.cache_result('bar_store', hit=not fetch_needed)
+        if fetch_needed and stored is not None:
+            full, full_meta = read_frame(directory)
+            if full is not None:
+                stored, meta = full, full_meta
+
+        if needs_full_fetch:
+            logging.info(f"Bar store: full fetch of {symbol} {interval} for {period}")
+            with metrics.upstream_call('yfinance'):
+                fresh = stock.history(period=period, interval=interval)
+            if fresh.empty:
+                return fresh
+            stored_span = max(span, meta.get('span', 0) if meta else 0)
+            data = _trim_bars(_merge_bars(stored, fresh), stored_span)
+            write_frame(directory, data, {
+                'span': stored_span,
+                'reconciled_at': now,
+                'fetched_at': now,
+            })
+            fetched_at = now
+        elif fetch_needed:
+            logging.info(f"Bar store: tail fetch of {symbol} {interval} since {stored.index[-1]}")
+            with metrics.upstream_call('yfinance'):
+                fresh = stock.history(start=stored.index[-1], interval=interval)
+            data = _trim_bars(_merge_bars(stored, fresh), meta['span'])
+            write_frame(directory, data, dict(meta, fetched_at=now))
+            fetched_at = now
+        else:
+            data = stored
+            fetched_at = meta.get('fetched_at', now)
+
+    # Cache until the store would fetch again
+    ttl = fetched_at + _INTERVAL_SECONDS.get(interval, 60) - time.time()
+    if ttl <= 0:
+        return _slice_period(data, period)
+    return price_cache.put(cache_key, _slice_period(data, period), ttl)
+
 def calculate_support_resistance(data, window=14):
     rolling_min = data['Low'].rolling(window=window).min()
     rolling_max = data['High'].rolling(window=window).max()
@@ -109,16 +339,11 @@ def get_advanced_stock_data(symbol, period="1mo"):
         stock = yf.Ticker(symbol)
         yf_period, interval = valid_periods[period]
         
-        data = stock.history(period=yf_period, interval=interval)
+        data = get_stored_bars(stock, symbol, yf_period, interval)
         
         if data.empty:
             raise InvalidStockSymbolError(f"No data available for symbol: {symbol} with period {period}. Please try a different period or stock symbol.")
         
-        support, resistance = calculate_support_resistance(data)
-        
-        data['Support'] = support
-        data['Resistance'] = resistance
-        
         return data
     except yf.exceptions.YFinanceException as yfe:
         logging.error(f"YFinance error for {symbol} with period {period}: {str(yfe)}")
@@ -129,6 +354,257 @@ def get_advanced_stock_data(symbol, period="1mo"):
         logging.error(traceback.format_exc())
         raise InvalidStockSymbolError(f"Error fetching data for symbol: {symbol} with period {period}. Please try again or enter a different symbol.")
 
+def get_daily_history(symbol, period="1y"):
+    """
+    Daily bars for any yfinance period (e.g. "2y", "10y"), served from the local bar store.
+
+    :param symbol: Stock symbol
+    :param period: yfinance period string
+    :return: OHLCV DataFrame
+    """
+    if not is_valid_symbol(symbol):
+        raise InvalidStockSymbolError(f"Invalid stock symbol: {symbol}. Please enter a valid stock symbol.")
+    try:
+        data = get_stored_bars(yf.Ticker(symbol), symbol, period, '1d')
+    except Exception as e:
+        logging.error(f"Error fetching daily history for {symbol} with period {period}: {str(e)}")
+        logging.error(traceback.format_exc())
+        raise InvalidStockSymbolError(f"Error fetching data for symbol: {symbol} with period {period}. Please try again or enter a different symbol.")
+    if data.empty:
+        raise InvalidStockSymbolError(f"No data available for symbol: {symbol} with period {period}. Please try a different period or stock symbol.")
+    return data
+
+def _fetch_watchlist_history_individually(symbols, period, interval):
+    frames = {}
+    failures = {}
+
+    def fetch(symbol):
+        with metrics.upstream_call('yfinance'):
+            return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    with ThreadPoolExecutor(max_workers=min(WATCHLIST_MAX_WORKERS, len(symbols))) as executor:
+        futures = {symbol: executor.submit(metrics.in_current_trace(fetch), symbol) for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                data = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching watchlist history for {symbol}: {str(e)}")
+                failures[symbol] = str(e)
+                continue
+            if data.empty:
+                failures[symbol] = "No data available"
+            else:
+                frames[symbol] = data
+
+    history = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+    return history, failures
+
+def get_watchlist_history(symbols, period="1mo", interval="1d"):
+    """
+    Fetch history for a whole watchlist with one multi-ticker download.
+
+    Results are shared process-wide for WATCHLIST_CACHE_TTL seconds, and concurrent
+    callers asking for the same watchlist wait for a single download. The returned
+    frame is shared and must not be modified.
+
+    :param symbols: List of stock symbols
+    :param period: yfinance period string
+    :param interval: yfinance interval string
+    :return: Tuple of (DataFrame with (symbol, field) columns, dict of symbol -> error message)
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols if symbol))
+    if not symbols:
+        return pd.DataFrame(), {}
+
+    key = (tuple(sorted(symbols)), period, interval)
+    with _watchlist_cache_lock:
+        entry = _watchlist_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _watchlist_cache.move_to_end(key)
+            metrics.cache_result('watchlist_history', hit=True)
+            return entry[1], dict(entry[2])
+        metrics.cache_result('watchlist_history', hit=False)
+        future = _watchlist_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _watchlist_inflight[key] = future
+
+    if not owner:
+        history, failures = future.result()
+        return history, dict(failures)
+
+    try:
+        history, failures = _download_watchlist_history(symbols, period, interval)
+    except Exception as e:
+        with _watchlist_cache_lock:
+            del _watchlist_inflight[key]
+        future.set_exception(e)
+        raise
+
+    with _watchlist_cache_lock:
+        _watchlist_cache[key] = (time.monotonic() + WATCHLIST_CACHE_TTL, history, failures)
+        _watchlist_cache.move_to_end(key)
+        while len(_watchlist_cache) > WATCHLIST_CACHE_SIZE:
+            _watchlist_cache.popitem(last=False)
+        del _watchlist_inflight[key]
+    future.set_result((history, failures))
+    return history, dict(failures)
+
+def clear_watchlist_cache():
+    with _watchlist_cache_lock:
+        _watchlist_cache.clear()
+
+def _download_watchlist_history(symbols, period, interval):
+    try:
+        with metrics.span('watchlist_fetch'), metrics.upstream_call('yfinance'):
+            history = yf.download(symbols, period=period, interval=interval, group_by='ticker',
+                                  auto_adjust=True, threads=True, progress=False)
+    except Exception as e:
+        logging.error(f"Batch download failed for watchlist, falling back to per-symbol requests: {str(e)}")
+        logging.error(traceback.format_exc())
+        return _fetch_watchlist_history_individually(symbols, period, interval)
+
+    if not isinstance(history.columns, pd.MultiIndex):
+        history = pd.concat({symbols[0]: history}, axis=1)
+
+    closes = history.xs('Close', axis=1, level=1)
+    empty = set(closes.columns[closes.isna().all()])
+    fetched = set(closes.columns)
+    failures = {symbol: "No data available" for symbol in symbols if symbol not in fetched or symbol in empty}
+    if empty:
+        history = history.drop(columns=list(empty), level=0)
+
+    return history.dropna(how='all'), failures
+
+def _download_missing_bars(symbols, period, interval):
+    """
+    Download bars for the symbols that have nothing in the bar store yet, in one batch request.
+
+    :return: Dictionary of symbol -> DataFrame of bars (empty when upstream had none);
+             empty if nothing was missing or the batch download failed
+    """
+    missing = [symbol for symbol in symbols
+               if read_meta(os.path.join(get_cache_dir('bars', interval), symbol)) is None]
+    if not missing:
+        return {}
+
+    logging.info(f"Bar store: batch fetch of {len(missing)} symbols {interval} for {period}")
+    try:
+        with metrics.span('watchlist_fetch'), metrics.upstream_call('yfinance'):
+            history = yf.download(missing, period=period, interval=interval, group_by='ticker',
+                                  auto_adjust=True, actions=True, ignore_tz=False, threads=True, progress=False)
+    except Exception as e:
+        # The per-symbol path fetches whatever is still missing
+        logging.error(f"Batch download failed for the bar store: {str(e)}")
+        return {}
+    if not isinstance(history.columns, pd.MultiIndex):
+        history = pd.concat({missing[0]: history}, axis=1)
+
+    fetched = set(history.columns.get_level_values(0))
+    bars = {}
+    for symbol in missing:
+        data = history[symbol] if symbol in fetched else pd.DataFrame()
+        bars[symbol] = data[data['Close'].notna()] if not data.empty else data
+    return bars
+
+def _store_new_bars(symbol, data, period, interval):
+    """
+    Write a fresh download for a symbol with nothing stored and return its bars for `period`.
+    """
+    if data.empty:
+        return data
+    span = _period_to_timedelta(period).total_seconds()
+    now = time.time()
+    with _get_bar_store_lock((symbol, interval)):
+        write_frame(os.path.join(get_cache_dir('bars', interval), symbol), _trim_bars(data, span), {
+            'span': span,
+            'reconciled_at': now,
+            'fetched_at': now,
+        })
+    return price_cache.put(('bars', symbol, period, interval), _slice_period(data, period),
+                           _INTERVAL_SECONDS.get(interval, 60))
+
+def get_watchlist_closes(symbols, period="6mo", interval="1d"):
+    """
+    Closing prices for a whole watchlist, served per symbol from the bar store.
+
+    Unlike `get_watchlist_history`, nothing is downloaded for symbols whose bars are
+    already stored and fresh. Symbols with nothing stored are fetched together in
+    one batch download; stored ones only fetch their own new bars.
+
+    :param symbols: List of stock symbols
+    :param period: yfinance period string
+    :param interval: yfinance interval string
+    :return: Tuple of (DataFrame with one column per symbol, dict of symbol -> error message)
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols if symbol))
+    if not symbols:
+        return pd.DataFrame(), {}
+
+    downloaded = _download_missing_bars(symbols, period, interval)
+
+    def fetch(symbol):
+        if symbol in downloaded:
+            return _store_new_bars(symbol, downloaded[symbol], period, interval)
+        return get_stored_bars(yf.Ticker(symbol), symbol, period, interval)
+
+    closes = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=min(WATCHLIST_MAX_WORKERS, len(symbols))) as executor:
+        futures = {symbol: executor.submit(metrics.in_current_trace(fetch), symbol) for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                data = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching stored bars for {symbol}: {str(e)}")
+                failures[symbol] = str(e)
+                continue
+            if data.empty:
+                failures[symbol] = "No data available"
+            else:
+                close = data['Close']
+                if close.index.tz is not None:
+                    # Daily bars line up by exchange date; intraday bars by instant
+                    close = close.tz_localize(None) if interval == '1d' else close.tz_convert('UTC')
+                closes[symbol] = close
+
+    return (pd.concat(closes, axis=1) if closes else pd.DataFrame()), failures
+
+def get_watchlist_quotes(symbols, period="1mo"):
+    """
+    Get the current price and recent performance for every symbol in a watchlist.
+
+    :param symbols: List of stock symbols
+    :param period: Window used for the performance columns
+    :return: Tuple of (DataFrame indexed by symbol, dict of symbol -> error message)
+    """
+    history, failures = get_watchlist_history(symbols, period=period)
+    if history.empty:
+        return pd.DataFrame(), failures
+
+    closes = history.xs('Close', axis=1, level=1).ffill()
+    highs = history.xs('High', axis=1, level=1)
+    lows = history.xs('Low', axis=1, level=1)
+    volumes = history.xs('Volume', axis=1, level=1)
+
+    current = closes.iloc[-1]
+    previous = closes.iloc[-2] if len(closes) > 1 else current
+    first = closes.bfill().iloc[0]
+
+    quotes = pd.DataFrame({
+        'currentPrice': current,
+        'previousClose': previous,
+        'change': current - previous,
+        'percentChange': (current / previous - 1) * 100,
+        'periodChange': (current / first - 1) * 100,
+        'periodHigh': highs.max(),
+        'periodLow': lows.min(),
+        'volume': volumes.ffill().iloc[-1],
+    })
+    quotes.index.name = 'symbol'
+    return quotes, failures
+
 def get_sector_contribution(stock):
     return {
         'Product A': 30,
@@ -137,4 +613,4 @@ def get_sector_contribution(stock):
         'Other': 25
     }
 
-__all__ = ['get_stock_data', 'get_stock_info', 'get_advanced_stock_data', 'InvalidStockSymbolError']
+__all__ = ['get_stock_data', 'get_stock_info', 'get_advanced_stock_data', 'get_daily_history', 'get_watchlist_closes', 'get_watchlist_history', 'get_watchlist_quotes', 'get_symbol_info', 'clear_symbol_info_cache', 'clear_watchlist_cache', 'InvalidStockSymbolError']
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+import metrics
+
+DEFAULT_WINDOWS = (5, 14, 30)
+# Relative width of a price level; pivots inside one bucket are merged
+DEFAULT_TOLERANCE = 0.005
+
+LEVEL_COLUMNS = ['window', 'kind', 'price', 'low', 'high', 'touches', 'first_touch', 'last_touch']
+LEVEL_DTYPES = {
+    'window': 'int64',
+    'kind': 'object',
+    'price': 'float64',
+    'low': 'float64',
+    'high': 'float64',
+    'touches': 'int64',
+    'first_touch': 'datetime64[ns]',
+    'last_touch': 'datetime64[ns]',
+}
+
+def _empty_levels(columns=LEVEL_COLUMNS):
+    return pd.DataFrame({column: pd.Series(dtype=LEVEL_DTYPES[column]) for column in columns})
+
+def rolling_support_resistance(data, windows=DEFAULT_WINDOWS):
+    """
+    Rolling support (lowest low) and resistance (highest high) for several window sizes.
+
+    :param data: OHLCV DataFrame
+    :param windows: Window sizes in bars
+    :return: DataFrame with `Support_<window>` and `Resistance_<window>` columns
+    """
+    columns = {}
+    for window in windows:
+        columns[f'Support_{window}'] = data['Low'].rolling(window).min()
+        columns[f'Resistance_{window}'] = data['High'].rolling(window).max()
+    return pd.DataFrame(columns, index=data.index)
+
+def _pivot_masks(values, windows, reduce):
+    """
+    Mark bars whose value equals the `reduce` (np.maximum or np.minimum) of the bars
+    within each window on either side, for all windows in one pass.
+
+    Every bar sees the values at distance 0..max(windows) through one sliding view;
+    the extreme within each radius is accumulated outward, so each window is one
+    column of the result. Bars whose neighbourhood runs off either end or holds a
+    NaN are never pivots, as with a centered rolling extreme.
+
+    :return: Boolean array of shape (bars, len(windows))
+    """
+    widest = max(windows)
+    padded = np.concatenate((np.full(widest, np.nan), values, np.full(widest, np.nan)))
+    view = np.lib.stride_tricks.sliding_window_view(padded, 2 * widest + 1)
+    rings = reduce(view[:, widest::-1], view[:, widest:])
+    extremes = reduce.accumulate(rings, axis=1)[:, list(windows)]
+    return values[:, None] == extremes
+
+def find_pivots(data, window):
+    """
+    Find swing pivots: bars whose high (low) is the extreme of the `window` bars on either side.
+
+    :param data: OHLCV DataFrame
+    :param window: Number of bars on each side of a pivot
+    :return: Tuple of boolean arrays (pivot_highs, pivot_lows)
+    """
+    pivot_highs = _pivot_masks(data['High'].to_numpy(dtype='float64'), (window,), np.maximum)
+    pivot_lows = _pivot_masks(data['Low'].to_numpy(dtype='float64'), (window,), np.minimum)
+    return pivot_highs[:, 0], pivot_lows[:, 0]
+
+def cluster_levels(prices, times, tolerance=DEFAULT_TOLERANCE):
+    """
+    Cluster pivot prices into levels.
+
+    Prices are bucketed on a logarithmic grid with a step of `tolerance`, so a
+    level never spans more than that relative width no matter how many pivots
+    fall into it.
+
+    :param prices: Array of pivot prices
+    :param times: Array of pivot timestamps (datetime64)
+    :param tolerance: Relative width of a level
+    :return: DataFrame with price, low, high, touches, first_touch and last_touch per level
+    """
+    prices = np.asarray(prices, dtype='float64')
+    if len(prices) == 0:
+        return _empty_levels(LEVEL_COLUMNS[2:])
+
+    order = np.argsort(prices, kind='stable')
+    sorted_prices = prices[order]
+    sorted_times = np.asarray(times)[order].astype('datetime64[ns]').astype('int64')
+
+    buckets = np.floor(np.log(sorted_prices) / np.log1p(tolerance))
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    touches = np.diff(np.append(starts, len(sorted_prices)))
+
+    levels = pd.DataFrame({
+        'price': np.add.reduceat(sorted_prices, starts) / touches,
+        'low': sorted_prices[starts],
+        'high': np.maximum.reduceat(sorted_prices, starts),
+        'touches': touches,
+        'first_touch': np.minimum.reduceat(sorted_times, starts).astype('datetime64[ns]'),
+        'last_touch': np.maximum.reduceat(sorted_times, starts).astype('datetime64[ns]'),
+    })
+    return levels
+
+def detect_levels(data, windows=DEFAULT_WINDOWS, tolerance=DEFAULT_TOLERANCE):
+    """
+    Detect support and resistance price levels from clustered swing pivots.
+
+    Runs in linear time over the bars (plus a sort of the pivots) and returns a
+    compact table instead of per-row values.
+
+    :param data: OHLCV DataFrame
+    :param windows: Pivot window sizes to detect levels for
+    :param tolerance: Relative width of a level
+    :return: DataFrame with one row per level: window, kind, price, low, high,
+             touches, first_touch and last_touch
+    """
+    if data.empty:
+        return _empty_levels()
+
+    with metrics.span('level_detection'):
+        return _detect_levels(data, windows, tolerance)
+
+def _detect_levels(data, windows, tolerance):
+    times = data.index.to_numpy()
+    if isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+        times = data.index.tz_convert('UTC').tz_localize(None).to_numpy()
+    highs = data['High'].to_numpy(dtype='float64')
+    lows = data['Low'].to_numpy(dtype='float64')
+    windows = list(windows)
+    pivot_highs = _pivot_masks(highs, windows, np.maximum)
+    pivot_lows = _pivot_masks(lows, windows, np.minimum)
+
+    tables = []
+    for column, window in enumerate(windows):
+        for kind, mask, prices in (('support', pivot_lows[:, column], lows),
+                                   ('resistance', pivot_highs[:, column], highs)):
+            levels = cluster_levels(prices[mask], times[mask], tolerance)
+            if levels.empty:
+                continue
+            levels.insert(0, 'kind', kind)
+            levels.insert(0, 'window', window)
+            tables.append(levels)
+
+    levels = pd.concat(tables, ignore_index=True) if tables else _empty_levels()
+    if isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+        for column in ('first_touch', 'last_touch'):
+            levels[column] = levels[column].dt.tz_localize('UTC').dt.tz_convert(data.index.tz)
+    return levels[LEVEL_COLUMNS]
+
+def nearest_levels(levels, price, min_touches=2):
+    """
+    Pick the closest support below and resistance above `price`.
+
+    On each side, levels with at least `min_touches` touches are preferred when
+    any exist there; otherwise the weaker levels on that side are used.
+
+    :return: Tuple of (support, resistance); either may be None
+    """
+    if levels.empty:
+        return None, None
+    strong = levels['touches'] >= min_touches
+    supports = (levels['kind'] == 'support') & (levels['price'] <= price)
+    resistances = (levels['kind'] == 'resistance') & (levels['price'] >= price)
+    if (supports & strong).any():
+        supports &= strong
+    if (resistances & strong).any():
+        resistances &= strong
+    support = levels.loc[supports, 'price'].max() if supports.any() else None
+    resistance = levels.loc[resistances, 'price'].min() if resistances.any() else None
+    return support, resistance
@@ -1,10 +1,12 @@
-import pandas as pd
-import io
+import os
 
-def convert_to_csv(df):
+# Root directory for local caches (bar store, etc.)
+CACHE_DIR = os.environ.get('STOCK_CACHE_DIR', '.cache')
+
+def get_cache_dir(*parts):
     """
-    Convert a pandas DataFrame to CSV format.
+    Return a directory under the local cache root, creating it if needed.
     """
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=True)
-    return csv_buffer.getvalue()
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path